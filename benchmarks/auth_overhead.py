@@ -0,0 +1,47 @@
+"""
+Microbenchmark of per-request access-token verification.
+
+    uv run python benchmarks/auth_overhead.py
+
+Compares JWTHandler.verify_token with the verified-token cache disabled
+(jwt.decode + TokenPayload.model_validate on every call) and enabled.
+"""
+
+import time
+import timeit
+
+import jwt
+
+from core.auth.jwt_auth import JWTHandler
+from core.auth.keys import KeyRing, SigningKey
+
+SECRET = "benchmark-secret-key-with-enough-entropy"  # noqa: S105
+ALGORITHM = "HS256"
+ITERATIONS = 50_000
+
+
+def _token() -> str:
+    now = int(time.time())
+    payload = {"sub_id": 1, "iat": now, "exp": now + 1800, "jti": "benchmark", "ver": 0}
+    return jwt.encode(payload, SECRET, algorithm=ALGORITHM)
+
+
+def _measure(handler: JWTHandler, token: str) -> float:
+    handler.verify_token(token)  # warm up (fills the cache when enabled)
+    seconds = timeit.timeit(lambda: handler.verify_token(token), number=ITERATIONS)
+    return seconds / ITERATIONS * 1_000_000
+
+
+def main() -> None:
+    token = _token()
+    key_ring = KeyRing(SigningKey(algorithm=ALGORITHM, verifying_key=SECRET, signing_key=SECRET))
+    uncached = _measure(JWTHandler(key_ring, cache_size=0), token)
+    cached = _measure(JWTHandler(key_ring, cache_size=10_000), token)
+
+    print(f"verify_token without cache: {uncached:8.2f} us/request")
+    print(f"verify_token with cache:    {cached:8.2f} us/request")
+    print(f"speedup:                    {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Write throughput of the confirm_code table before and after its index slimming.
+
+    uv run python benchmarks/confirm_code_writes.py [rows] [updates]
+
+Builds two copies of the table in a scratch schema, one with the original seven
+secondary indexes and fillfactor 100, one with the current layout, and fills
+both with ``rows`` codes. It then replays the same ``updates`` attempts against
+each: four wrong-code counter increments for every resend, each in its own
+autocommitted transaction as a request would. It reports attempts per second
+and the share of updates that were HOT, i.e. written without touching any
+index. The scratch schema is dropped afterwards.
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.database import get_db_engine
+
+SCHEMA = "bench_confirm_code"
+
+ORIGINAL_INDEXED = ["code", "try_count", "resend_count", "email", "expire_time", "unlock_time", "resend_unlock_time"]
+
+COLUMNS = """
+    id bigserial PRIMARY KEY,
+    code integer NOT NULL,
+    try_count integer NOT NULL,
+    resend_count integer NOT NULL,
+    email varchar(255) NOT NULL,
+    expire_time timestamptz,
+    unlock_time timestamptz,
+    resend_unlock_time timestamptz,
+    created_at timestamp NOT NULL DEFAULT now(),
+    updated_at timestamp NOT NULL DEFAULT now()
+"""
+
+LAYOUTS = {
+    "before": [
+        f"CREATE TABLE {SCHEMA}.before ({COLUMNS})",
+        *(f"CREATE INDEX ON {SCHEMA}.before ({column})" for column in ORIGINAL_INDEXED),
+    ],
+    "after": [
+        f"CREATE TABLE {SCHEMA}.after ({COLUMNS}) WITH (fillfactor = 70)",
+        f"CREATE UNIQUE INDEX ON {SCHEMA}.after (email)",
+        f"CREATE INDEX ON {SCHEMA}.after (GREATEST(expire_time, unlock_time, resend_unlock_time)) "
+        "WHERE expire_time IS NOT NULL",
+    ],
+}
+
+WRONG_CODE = "UPDATE {table} SET try_count = try_count + 1, updated_at = now() WHERE email = :email"
+RESEND = (
+    "UPDATE {table} SET code = :code, try_count = 0, resend_count = resend_count + 1, "
+    "expire_time = now() + interval '120 seconds', resend_unlock_time = now() + interval '120 seconds', "
+    "updated_at = now() WHERE email = :email"
+)
+
+
+async def _prepare(connection: AsyncConnection, table: str, rows: int) -> None:
+    for statement in LAYOUTS[table]:
+        await connection.execute(text(statement))
+    await connection.execute(
+        text(
+            f"INSERT INTO {SCHEMA}.{table} (code, try_count, resend_count, email, expire_time, resend_unlock_time) "  # noqa: S608
+            "SELECT 1000 + i % 9000, 0, 1, 'bench' || i || '@example.com', "
+            "now() + interval '120 seconds', now() + interval '120 seconds' FROM generate_series(1, :rows) AS i"
+        ),
+        {"rows": rows},
+    )
+    await connection.execute(text(f"VACUUM ANALYZE {SCHEMA}.{table}"))
+
+
+async def _replay(connection: AsyncConnection, table: str, attempts: list[tuple[bool, int]]) -> tuple[float, float]:
+    wrong_code = text(WRONG_CODE.format(table=f"{SCHEMA}.{table}"))
+    resend = text(RESEND.format(table=f"{SCHEMA}.{table}"))
+    started = time.perf_counter()
+    for is_resend, row in attempts:
+        email = f"bench{row}@example.com"
+        if is_resend:
+            await connection.execute(resend, {"email": email, "code": 1000 + row % 9000})
+        else:
+            await connection.execute(wrong_code, {"email": email})
+    elapsed = time.perf_counter() - started
+
+    await connection.execute(text("SELECT pg_stat_force_next_flush()"))
+    stats = (
+        await connection.execute(
+            text(
+                "SELECT n_tup_upd, n_tup_hot_upd FROM pg_stat_user_tables "
+                "WHERE schemaname = :schema AND relname = :table"
+            ),
+            {"schema": SCHEMA, "table": table},
+        )
+    ).one()
+    return elapsed, stats.n_tup_hot_upd / max(stats.n_tup_upd, 1)
+
+
+async def main(rows: int, updates: int) -> None:
+    randomizer = random.Random(42)  # noqa: S311
+    attempts = [(i % 5 == 4, randomizer.randint(1, rows)) for i in range(updates)]
+    engine = get_db_engine()
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        try:
+            for table in LAYOUTS:
+                await _prepare(connection, table, rows)
+            for table in LAYOUTS:
+                elapsed, hot = await _replay(connection, table, attempts)
+                print(f"{table:<6}: {updates} attempts in {elapsed:.2f} s ({updates / elapsed:,.0f}/s), {hot:.0%} HOT")
+        finally:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 20_000,
+        )
+    )
@@ -0,0 +1,92 @@
+"""
+Throughput of the verification code stores.
+
+    uv run python benchmarks/confirm_store.py [cycles] [postgres|redis ...]
+
+Each cycle sends a code to a fresh email, submits one wrong code and then the
+right one, committing after every call as a request would. Postgres uses the
+configured database (rows are deleted afterwards), Redis the REDIS_* settings.
+"""
+
+import asyncio
+import sys
+import time
+
+from redis.asyncio import Redis
+from sqlalchemy import delete
+
+from core.database import get_session_factory
+from core.exceptions.confirm import ConfirmError
+from core.settings import redis_settings
+from db.crud.confirm import ConfirmCodeStore, PostgresConfirmCodeStore
+from db.crud.confirm_redis import RedisConfirmCodeStore
+from db.models.confirm import ConfirmCode
+
+EMAIL = "bench-confirm-{}@example.com"
+
+
+async def _cycles(store: ConfirmCodeStore, cycles: int) -> float:
+    started = time.perf_counter()
+    for i in range(cycles):
+        email = EMAIL.format(i)
+        await store.prepare_and_save_code(email, 1111)
+        try:
+            await store.verify_code(email, 2222)
+        except ConfirmError:
+            pass
+        await store.verify_code(email, 1111)
+    return time.perf_counter() - started
+
+
+class _CommittingStore:
+    """Commits after each call, like the request dependency does."""
+
+    def __init__(self, store: PostgresConfirmCodeStore) -> None:
+        self.store = store
+
+    async def prepare_and_save_code(self, email: str, code: int) -> None:
+        await self.store.prepare_and_save_code(email, code)
+        await self.store.session.commit()
+
+    async def verify_code(self, email: str, code: int) -> bool:
+        try:
+            return await self.store.verify_code(email, code)
+        finally:
+            await self.store.session.commit()
+
+
+async def _postgres(cycles: int) -> float:
+    async with get_session_factory()() as session:
+        try:
+            return await _cycles(_CommittingStore(PostgresConfirmCodeStore(session)), cycles)
+        finally:
+            await session.rollback()
+            await session.execute(delete(ConfirmCode).where(ConfirmCode.email.like(EMAIL.format("%"))))
+            await session.commit()
+
+
+async def _redis(cycles: int) -> float:
+    redis = Redis.from_url(redis_settings.url, decode_responses=True)
+    try:
+        return await _cycles(RedisConfirmCodeStore(redis), cycles)
+    finally:
+        await redis.aclose()
+
+
+async def main(cycles: int, backends: list[str]) -> None:
+    runners = {"postgres": _postgres, "redis": _redis}
+    for backend in backends:
+        elapsed = await runners[backend](cycles)
+        print(
+            f"{backend:<8}: {cycles} cycles in {elapsed:.2f} s "
+            f"({3 * cycles / elapsed:,.0f} calls/s, {elapsed / cycles * 1000:.2f} ms per send + 2 verifies)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 2_000,
+            sys.argv[2:] or ["postgres", "redis"],
+        )
+    )
@@ -0,0 +1,127 @@
+"""
+Email throughput of one Celery worker process against a local aiosmtpd server.
+
+    uv run python benchmarks/smtp_pool.py [messages]
+
+The server offers STARTTLS with a throwaway self-signed certificate and
+requires AUTH, like a real relay. ``messages`` (default 200) are sent the old
+way, ``asyncio.run(aiosmtplib.send(...))`` per message with its own loop,
+connection, handshake and login, and then through SMTPSender as
+send_confirm_task does, one after another and from four threads.
+"""
+
+import asyncio
+import socket
+import ssl
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from aiosmtplib import send
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from core.smtp import SMTPPool, SMTPSender
+
+
+class Sink:
+    def __init__(self) -> None:
+        self.messages = 0
+        self.logins = 0
+
+    def authenticate(self, *args: Any) -> AuthResult:
+        self.logins += 1
+        return AuthResult(success=True)
+
+    async def handle_DATA(self, server: Any, session: Any, envelope: Any) -> str:
+        self.messages += 1
+        return "250 OK"
+
+
+def _tls_context(directory: Path) -> ssl.SSLContext:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.now(UTC)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    (directory / "cert.pem").write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    (directory / "key.pem").write_bytes(
+        key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(directory / "cert.pem", directory / "key.pem")
+    return context
+
+
+def _message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "no-reply@example.com"
+    message["To"] = f"user{number}@example.com"
+    message["Subject"] = "Activate Your Account"
+    message.set_content(f"Your confirmation code is {number:04d}.")
+    return message
+
+
+def main(messages: int) -> None:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    options: dict[str, Any] = {
+        "hostname": "127.0.0.1",
+        "port": port,
+        "username": "user",
+        "password": "secret",
+        "start_tls": True,
+        "validate_certs": False,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        sink = Sink()
+        controller = Controller(
+            sink,
+            hostname="127.0.0.1",
+            port=port,
+            tls_context=_tls_context(Path(directory)),
+            require_starttls=True,
+            authenticator=sink.authenticate,
+        )
+        controller.start()
+        try:
+            started = time.perf_counter()
+            for number in range(messages):
+                asyncio.run(send(_message(number), **options))
+            per_message = time.perf_counter() - started
+            print(f"connection per message: {messages / per_message:7,.0f} msg/s, {sink.logins} logins")
+
+            for label, threads in (("pooled, sequential", 1), ("pooled, 4 threads", 4)):
+                sink.logins = 0
+                sender = SMTPSender(SMTPPool(max_size=threads, max_idle=30, **options))
+                started = time.perf_counter()
+                with ThreadPoolExecutor(threads) as executor:
+                    list(executor.map(sender.send, map(_message, range(messages))))
+                elapsed = time.perf_counter() - started
+                sender.close(timeout=30)
+                print(f"{label + ':':<23} {messages / elapsed:7,.0f} msg/s, {sink.logins} logins")
+        finally:
+            controller.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
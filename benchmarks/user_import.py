@@ -0,0 +1,148 @@
+"""
+Throughput of the bulk user import against a migrated database.
+
+    uv run python benchmarks/user_import.py [rows]
+
+Imports ``rows`` (default 100 000) CSV users through UserImportService end to
+end, then compares the database side alone, COPY into staging plus one merge,
+with one ORM insert and commit per user as signup does. Everything runs in
+transactions that are rolled back. Passwords are hashed with a deliberately
+cheap Argon2 setting; the cost of the configured hasher is printed separately,
+since it scales with rows / PASSWORD_HASH_WORKERS on any import path. Last,
+logins are verified with the configured hasher while the same executor hashes
+an import batch, to show how long they wait behind it.
+"""
+
+import asyncio
+import sys
+import time
+from collections.abc import AsyncIterator
+
+from core.auth.password import (
+    Argon2Hasher,
+    BcryptHasher,
+    PasswordContext,
+    PasswordExecutor,
+    build_password_context,
+    get_password_executor,
+)
+from core.database import get_session_factory
+from core.settings import password_settings
+from db.crud.confirm import ConfirmCodeCRUD
+from db.crud.user import UserCRUD
+from db.models.user import User
+from services.confirm import ConfirmService
+from services.user_import import UserImportService
+
+ORM_ROWS = 2_000
+CHUNK_SIZE = 64 * 1024
+
+
+def _csv(rows: int) -> bytes:
+    lines = ["email,first_name,last_name,password"]
+    lines += [f"bench{i}@example.com,First{i},Last{i},secret{i:06d}" for i in range(rows)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def _chunks(body: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start : start + CHUNK_SIZE]
+
+
+async def _bulk_import(rows: int, executor: PasswordExecutor) -> float:
+    body = _csv(rows)
+    async with get_session_factory()() as session:
+        user_crud = UserCRUD(session=session, confirm_service=ConfirmService(ConfirmCodeCRUD(session)))
+        service = UserImportService(user_crud=user_crud, password_executor=executor)
+        started = time.perf_counter()
+        report = await service.import_users(_chunks(body), "csv")
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    if report.imported != rows:
+        raise RuntimeError(f"Imported {report.imported} of {rows} rows: {report.errors[:5]}")
+    return elapsed
+
+
+async def _copy_and_merge(rows: int, password_hash: str) -> float:
+    records = [(i, f"copy{i}@example.com", "First", "Last", password_hash) for i in range(rows)]
+    async with get_session_factory()() as session:
+        user_crud = UserCRUD(session=session, confirm_service=ConfirmService(ConfirmCodeCRUD(session)))
+        started = time.perf_counter()
+        await user_crud.create_import_staging()
+        for start in range(0, rows, 5_000):
+            await user_crud.copy_import_rows(records[start : start + 5_000])
+        await user_crud.merge_import()
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    return elapsed
+
+
+async def _orm_inserts(rows: int, password_hash: str) -> float:
+    async with get_session_factory()() as session:
+        connection = await session.connection()
+        started = time.perf_counter()
+        # A savepoint per user stands in for signup's commit, so everything can be rolled back.
+        for i in range(rows):
+            async with connection.begin_nested():
+                session.add(User(email=f"orm{i}@example.com", first_name="First", password=password_hash))
+                await session.flush()
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    return elapsed
+
+
+def _configured_hash_seconds() -> float:
+    context = build_password_context(password_settings)
+    started = time.perf_counter()
+    for _ in range(5):
+        context.hash("benchmark-password")
+    return (time.perf_counter() - started) / 5
+
+
+async def _verify_latency_during_import(passwords: int) -> tuple[float, float]:
+    """Worst and mean latency of verifications issued while ``passwords`` are hashed in bulk."""
+    executor = get_password_executor()
+    password_hash = await executor.hash("benchmark-password")
+    latencies: list[float] = []
+    try:
+        bulk = asyncio.create_task(executor.hash_many([f"secret{i:06d}" for i in range(passwords)]))
+        while not bulk.done():
+            started = time.perf_counter()
+            await executor.verify("benchmark-password", password_hash)
+            latencies.append(time.perf_counter() - started)
+        await bulk
+    finally:
+        executor.shutdown()
+    return max(latencies), sum(latencies) / len(latencies)
+
+
+async def main(rows: int) -> None:
+    cheap = Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1)
+    executor = PasswordExecutor(
+        context=PasswordContext(default=cheap, hashers=[BcryptHasher(rounds=4)]),
+        workers=password_settings.hash_workers,
+        queue_size=password_settings.hash_queue_size,
+    )
+    try:
+        bulk = await _bulk_import(rows, executor)
+    finally:
+        executor.shutdown()
+    password_hash = cheap.hash("benchmark-password")
+    copy = await _copy_and_merge(rows, password_hash)
+    orm = await _orm_inserts(ORM_ROWS, password_hash)
+
+    hash_seconds = _configured_hash_seconds()
+    worst, mean = await _verify_latency_during_import(min(rows, 500))
+    print(f"import end to end: {rows} rows in {bulk:.2f} s ({rows / bulk:,.0f} rows/s)")
+    print(f"COPY + merge:      {rows} rows in {copy:.2f} s ({rows / copy:,.0f} rows/s)")
+    print(f"row-by-row insert: {ORM_ROWS} rows in {orm:.2f} s ({ORM_ROWS / orm:,.0f} rows/s)")
+    print(
+        f"configured hasher: {hash_seconds * 1000:.1f} ms/hash, "
+        f"~{rows * hash_seconds / password_settings.hash_workers:.0f} s for {rows} rows "
+        f"on {password_settings.hash_workers} workers"
+    )
+    print(f"verify during import: {mean * 1000:.1f} ms mean, {worst * 1000:.1f} ms worst")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -1,17 +1,23 @@
+from datetime import UTC, datetime
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status
 
+from core.auth.revocation import get_revocation_list
+from db.crud.refresh_token import RefreshTokenCRUD, get_refresh_token_crud
+from db.crud.revoked_token import RevokedTokenCRUD, get_revoked_token_crud
 from db.crud.user import UserCRUD, get_user_crud
 from db.models.user import User
 from schemas.auth import (
     AuthSchema,
     RefreshRequestSchema,
     RefreshTokenSchema,
+    TokenPayload,
     TokenSchema,
 )
 from schemas.confirm import ConfirmResendSchema, ConfirmSchema
 from schemas.user import UserReadSchema, UserRegisterSchema
+from services.auth import get_current_user
 from services.jwt import auth_strategy
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -22,20 +28,44 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
     summary="User login",
     description="Authenticate a user with email and password and return access/refresh tokens.",
 )
-async def login(obj_in: AuthSchema, user_crud: Annotated[UserCRUD, Depends(get_user_crud)]) -> TokenSchema:
-    return await auth_strategy.authenticate(obj_in.model_dump(), user_crud)
+async def login(
+    obj_in: AuthSchema,
+    user_crud: Annotated[UserCRUD, Depends(get_user_crud)],
+    refresh_token_crud: Annotated[RefreshTokenCRUD, Depends(get_refresh_token_crud)],
+) -> TokenSchema:
+    return await auth_strategy.authenticate(obj_in.model_dump(), user_crud, refresh_token_crud)
 
 
 @router.post(
     "/refresh",
     summary="Refresh access token",
-    description="Generate a new access token using a valid refresh token.",
+    description=(
+        "Exchange a refresh token for a new access/refresh token pair. Each refresh token works once; "
+        "reusing a spent one revokes every token of its login session."
+    ),
 )
 async def refresh(
     refresh_token: RefreshRequestSchema,
-    user_crud: Annotated[UserCRUD, Depends(get_user_crud)],
+    refresh_token_crud: Annotated[RefreshTokenCRUD, Depends(get_refresh_token_crud)],
 ) -> RefreshTokenSchema:
-    return await auth_strategy.refresh_token(refresh_token.refresh_token, user_crud)
+    return await auth_strategy.refresh_token(refresh_token.refresh_token, refresh_token_crud)
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="User logout",
+    description="Revoke the access token used for this request and the refresh tokens of its login session.",
+)
+async def logout(
+    current_user: Annotated[TokenPayload, Depends(get_current_user())],
+    revoked_token_crud: Annotated[RevokedTokenCRUD, Depends(get_revoked_token_crud)],
+    refresh_token_crud: Annotated[RefreshTokenCRUD, Depends(get_refresh_token_crud)],
+) -> None:
+    expires_at = datetime.fromtimestamp(current_user.exp, UTC)
+    await get_revocation_list().revoke(revoked_token_crud, current_user.jti, expires_at)
+    if current_user.fid is not None:
+        await refresh_token_crud.delete_family(current_user.fid)
 
 
 @router.post(
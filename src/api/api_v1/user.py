@@ -1,19 +1,53 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from core.constants.role import UserRole
+from core.exceptions.user import UnsupportedImportFormat
 from db.crud.user import UserCRUD, get_user_crud
+from db.dependencies import get_read_session_factory
 from db.models.user import User
 from schemas.auth import TokenPayload
 from schemas.paginations import PaginatedResponse, PaginationLinks
-from schemas.user import UserReadSchema, UserUpdateSchema
+from schemas.user import (
+    UserFilterSchema,
+    UserImportReportSchema,
+    UserReadSchema,
+    UserRoleUpdateSchema,
+    UserUpdateSchema,
+)
 from services.auth import get_current_user
 from services.paginations import PaginationHelper
+from services.user_export import EXPORT_MEDIA_TYPES, ExportFormat, export_users_stream, gzip_stream
+from services.user_import import ImportFormat, UserImportService
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+USERS_PATH = "/api/v1/users/"
+
+IMPORT_FORMATS: dict[str, ImportFormat] = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def get_user_filters(
+    role: Annotated[UserRole | None, Query(description="Only users with this role")] = None,
+    is_verified: Annotated[bool | None, Query(description="Only verified or only unverified users")] = None,
+    created_from: Annotated[datetime | None, Query(description="Only users created at or after this time")] = None,
+    created_to: Annotated[datetime | None, Query(description="Only users created before this time")] = None,
+    q: Annotated[
+        str | None,
+        Query(min_length=3, max_length=100, description="Case-insensitive substring of the email or name"),
+    ] = None,
+) -> UserFilterSchema:
+    return UserFilterSchema(role=role, is_verified=is_verified, created_from=created_from, created_to=created_to, q=q)
+
 
 @router.get(
     "/me",
@@ -39,24 +73,98 @@ async def get_me(
 async def list_users(
     crud: Annotated[UserCRUD, Depends(get_user_crud)],
     admin_user: Annotated[TokenPayload, Depends(get_current_user(roles=[UserRole.ADMIN]))],
+    filters: Annotated[UserFilterSchema, Depends(get_user_filters)],
     limit: Annotated[int, Query(ge=1, le=500, description="Maximum number of users per page")] = 100,
     offset: Annotated[int, Query(ge=0, description="Offset for pagination")] = 0,
+    pagination: Annotated[
+        Literal["offset", "cursor"],
+        Query(description="Pagination mode; cursor mode is constant-time per page and omits the total count"),
+    ] = "offset",
+    cursor: Annotated[str | None, Query(description="Opaque cursor from a previous page; implies cursor mode")] = None,
 ) -> PaginatedResponse[UserReadSchema]:
     """
     Get a paginated list of users.
     **Access restricted to ADMINs.**
     """
-    users, total = await crud.get_list(limit=limit, offset=offset)
+    params = filters.model_dump(mode="json", exclude_none=True)
+
+    if cursor is not None or pagination == "cursor":
+        key, direction = PaginationHelper.decode_cursor(cursor) if cursor is not None else (None, None)
+        users, has_more = await crud.get_page(
+            limit=limit,
+            after=key if direction == "next" else None,
+            before=key if direction == "prev" else None,
+            filters=filters,
+        )
+        next_link, prev_link = PaginationHelper(limit=limit).get_cursor_links(
+            first_key=users[0].id if users else None,
+            last_key=users[-1].id if users else None,
+            has_more=has_more,
+            direction=direction,
+            base_path=USERS_PATH,
+            params=params,
+        )
+        return PaginatedResponse(
+            items=TypeAdapter(list[UserReadSchema]).validate_python(users),
+            links=PaginationLinks(next=next_link, previous=prev_link),
+        )
+
+    users = await crud.get_list(limit=limit, offset=offset, filters=filters)
+    total, estimated = await crud.count(filters=filters)
 
-    pagination: PaginationHelper = PaginationHelper(limit=limit, offset=offset, total=total)
-    next_link, prev_link = pagination.get_pagination_links()
+    pagination_helper: PaginationHelper = PaginationHelper(limit=limit, offset=offset, total=total)
+    next_link, prev_link = pagination_helper.get_pagination_links(base_path=USERS_PATH, params=params)
 
     return PaginatedResponse(
         items=TypeAdapter(list[UserReadSchema]).validate_python(users),
-        links=PaginationLinks(next=next_link, previous=prev_link, count=total),
+        links=PaginationLinks(next=next_link, previous=prev_link, count=total, count_estimated=estimated),
     )
 
 
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export users (For ADMINs)",
+    description=(
+        "Stream all users matching the list filters as NDJSON or CSV, ordered by id, "
+        "optionally gzip-compressed (Content-Encoding: gzip)."
+    ),
+)
+async def export_users(
+    admin_user: Annotated[TokenPayload, Depends(get_current_user(roles=[UserRole.ADMIN]))],
+    filters: Annotated[UserFilterSchema, Depends(get_user_filters)],
+    session_factory: Annotated[async_sessionmaker[AsyncSession], Depends(get_read_session_factory)],
+    export_format: Annotated[ExportFormat, Query(alias="format", description="Output format")] = "ndjson",
+    gzip: Annotated[bool, Query(description="Compress the stream with gzip")] = False,
+) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="users.{export_format}"'}
+    body = export_users_stream(session_factory, filters, export_format)
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[export_format], headers=headers)
+
+
+@router.post(
+    "/import",
+    summary="Bulk import users (For ADMINs)",
+    description=(
+        "Create verified users from a streamed `text/csv` (header row required) or `application/x-ndjson` body "
+        "with email, password, first_name and last_name fields. Returns a per-row error report."
+    ),
+)
+async def import_users(
+    request: Request,
+    service: Annotated[UserImportService, Depends()],
+    admin_user: Annotated[TokenPayload, Depends(get_current_user(roles=[UserRole.ADMIN]))],
+) -> UserImportReportSchema:
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+    import_format = IMPORT_FORMATS.get(content_type)
+    if import_format is None:
+        raise UnsupportedImportFormat()
+    return await service.import_users(request.stream(), import_format)
+
+
 @router.get(
     "/{user_id}",
     response_model=UserReadSchema,
@@ -71,6 +179,21 @@ async def get_user(
     return await crud.get_by_id(user_id)
 
 
+@router.patch(
+    "/{user_id}/role",
+    response_model=UserReadSchema,
+    summary="Change user role (For ADMINs)",
+    description="Set the role of a user and revoke the tokens issued to them. Accessible only to administrators.",
+)
+async def set_user_role(
+    user_id: int,
+    payload: UserRoleUpdateSchema,
+    crud: Annotated[UserCRUD, Depends(get_user_crud)],
+    admin_user: Annotated[TokenPayload, Depends(get_current_user(roles=[UserRole.ADMIN]))],
+) -> User:
+    return await crud.set_role(user_id, payload.role)
+
+
 @router.patch(
     "/",
     response_model=UserReadSchema,
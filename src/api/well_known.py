@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Response
+
+from core.auth.keys import get_key_ring
+
+router = APIRouter(prefix="/.well-known")
+
+
+@router.get(
+    "/jwks.json",
+    summary="JSON Web Key Set",
+    description="Public keys for verifying access tokens offline, selected by the token's `kid` header.",
+)
+async def jwks() -> Response:
+    return Response(
+        get_key_ring().jwks,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=300"},
+    )
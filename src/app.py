@@ -4,6 +4,7 @@ from fastapi.responses import ORJSONResponse
 
 from api.api_v1.swagger import docs_routes
 from api.router import api_router
+from api.well_known import router as well_known_router
 from core.exceptions.base import register_exception_handlers
 from core.lifespan import lifespan
 from core.logger import configure_logger
@@ -45,6 +46,7 @@ def create_app() -> FastAPI:
 
     app.include_router(router=api_router, prefix="/api/v1")
     app.include_router(router=monitoring_router, tags=["Monitoring"])
+    app.include_router(router=well_known_router, tags=["Auth"])
     if settings.documentation_enabled:
         app.include_router(docs_routes)
 
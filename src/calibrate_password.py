@@ -0,0 +1,40 @@
+"""
+Calibrate password hashing cost for the current CPU.
+
+    uv run src/calibrate_password.py --target-ms 50
+
+Prints the PASSWORD_* environment variables that hit the target hash time.
+"""
+
+import argparse
+from functools import partial
+
+from core.auth.password import Argon2Hasher, BcryptHasher, calibrate
+from core.settings import password_settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scheme", choices=["argon2", "bcrypt"], default=password_settings.scheme)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"PASSWORD_SCHEME={args.scheme}")
+    if args.scheme == "bcrypt":
+        rounds = calibrate(BcryptHasher, start=4, stop=16, target_ms=args.target_ms)
+        print(f"PASSWORD_BCRYPT_ROUNDS={rounds}")
+        return
+
+    hasher_factory = partial(
+        Argon2Hasher,
+        memory_cost=password_settings.argon2_memory_cost,
+        parallelism=password_settings.argon2_parallelism,
+    )
+    time_cost = calibrate(lambda cost: hasher_factory(time_cost=cost), start=1, stop=20, target_ms=args.target_ms)
+    print(f"PASSWORD_ARGON2_TIME_COST={time_cost}")
+    print(f"PASSWORD_ARGON2_MEMORY_COST={password_settings.argon2_memory_cost}")
+    print(f"PASSWORD_ARGON2_PARALLELISM={password_settings.argon2_parallelism}")
+
+
+if __name__ == "__main__":
+    main()
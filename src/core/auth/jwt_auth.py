@@ -1,24 +1,44 @@
 # core/auth/jwt_auth.py
+import hashlib
+import time
+from collections import OrderedDict
+
 import jwt
 from fastapi import status
 from loguru import logger
 
+from core.auth.keys import KeyRing
 from core.exceptions.base import APIException
 from schemas.auth import TokenPayload
 
 
 class JWTHandler:
-    def __init__(self, secret_key: str, algorithm: str) -> None:
+    def __init__(self, key_ring: KeyRing, cache_size: int = 0) -> None:
         """
-        JWT handler for HS256 (symmetric secret-based) tokens.
+        JWT handler verifying tokens against the keys of ``key_ring``.
+
+        Up to ``cache_size`` verified payloads are kept in an LRU keyed by a
+        digest of the token, so a reused token is decoded and validated once
+        and then served from memory until its ``exp``.
         """
-        self.secret_key = secret_key
-        self.algorithm = algorithm
+        self.key_ring = key_ring
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, TokenPayload] = OrderedDict()
 
     def verify_token(self, token: str) -> TokenPayload:
+        token = str(token)
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached.exp > time.time():
+                self._cache.move_to_end(key)
+                return cached
+            # Expired: drop it and let jwt.decode raise the usual error.
+            del self._cache[key]
+
         try:
-            payload = jwt.decode(str(token), self.secret_key, algorithms=[self.algorithm])
-            return TokenPayload.model_validate(payload)
+            payload = self.key_ring.decode(token)
+            token_payload = TokenPayload.model_validate(payload)
 
         except jwt.ExpiredSignatureError as e:
             logger.warning("JWT expired")
@@ -34,3 +54,9 @@ class JWTHandler:
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Invalid token: {e}",
             ) from e
+
+        if self.cache_size > 0:
+            self._cache[key] = token_payload
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return token_payload
@@ -0,0 +1,93 @@
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from functools import cache, cached_property
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+
+from core.settings import JWTAuthSettings, jwt_settings
+
+# Members of the public JWK that form its RFC 7638 thumbprint, per key type.
+_THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+}
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    algorithm: str
+    verifying_key: Any
+    signing_key: Any = None
+    kid: str | None = None
+    jwk: dict[str, str] | None = None
+
+
+def _public_jwk(algorithm: str, public_key: Any) -> tuple[str, dict[str, str]]:
+    jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(public_key, as_dict=True)
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    kid = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+    return kid, {**jwk, "kid": kid, "alg": algorithm, "use": "sig"}
+
+
+def asymmetric_key(algorithm: str, private_key: Any = None, public_key: Any = None) -> SigningKey:
+    public_key = public_key if public_key is not None else private_key.public_key()
+    kid, jwk = _public_jwk(algorithm, public_key)
+    return SigningKey(algorithm=algorithm, verifying_key=public_key, signing_key=private_key, kid=kid, jwk=jwk)
+
+
+class KeyRing:
+    def __init__(self, active: SigningKey, retired: list[SigningKey] | None = None) -> None:
+        """
+        Sign with ``active`` and verify with any key of the ring, selected by ``kid``.
+
+        Rotation: deploy a new private key as active and move the previous public
+        key to ``retired``; drop it once tokens signed with it have expired.
+        """
+        self.active = active
+        self.keys = {key.kid: key for key in [*(retired or []), active]}
+
+    def encode(self, payload: dict[str, Any]) -> str:
+        headers = {"kid": self.active.kid} if self.active.kid else None
+        return jwt.encode(payload, self.active.signing_key, algorithm=self.active.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+    @cached_property
+    def jwks(self) -> bytes:
+        """Serialized JSON Web Key Set with the public keys of the ring."""
+        keys = [key.jwk for key in self.keys.values() if key.jwk is not None]
+        return json.dumps({"keys": keys}, separators=(",", ":")).encode()
+
+
+def load_key_ring(settings: JWTAuthSettings) -> KeyRing:
+    if settings.algorithm.startswith("HS"):
+        return KeyRing(
+            SigningKey(algorithm=settings.algorithm, verifying_key=settings.secret_key, signing_key=settings.secret_key)
+        )
+
+    if not settings.private_key_file:
+        raise ValueError(f"JWT_PRIVATE_KEY_FILE is required for {settings.algorithm}")
+
+    private_key = serialization.load_pem_private_key(Path(settings.private_key_file).read_bytes(), password=None)
+    retired = [
+        asymmetric_key(settings.algorithm, public_key=serialization.load_pem_public_key(Path(path).read_bytes()))
+        for path in settings.retired_public_key_files
+    ]
+    return KeyRing(asymmetric_key(settings.algorithm, private_key=private_key), retired)
+
+
+@cache
+def get_key_ring() -> KeyRing:
+    return load_key_ring(jwt_settings)
@@ -0,0 +1,273 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cache
+from typing import Any, TypeVar
+
+import bcrypt
+from argon2 import PasswordHasher as Argon2PasswordHasher
+from argon2 import Type
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from core.exceptions.auth import PasswordHasherBusyError
+from core.prometheus import get_metrics
+from core.settings import PasswordSettings, password_settings
+
+T = TypeVar("T")
+
+
+class PasswordHasher(ABC):
+    scheme: str
+
+    @abstractmethod
+    def identify(self, hashed_password: str) -> bool:
+        """Return True if the hash was produced by this backend."""
+
+    @abstractmethod
+    def hash(self, password: str) -> str: ...
+
+    @abstractmethod
+    def verify(self, password: str, hashed_password: str) -> bool: ...
+
+    @abstractmethod
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Return True if the hash was produced with different cost parameters."""
+
+
+class BcryptHasher(PasswordHasher):
+    scheme = "bcrypt"
+
+    def __init__(self, rounds: int = 12) -> None:
+        self.rounds = rounds
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(("$2a$", "$2b$", "$2y$"))
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.rounds)).decode("utf-8")
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+        except (ValueError, AttributeError):
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+class Argon2Hasher(PasswordHasher):
+    scheme = "argon2"
+
+    def __init__(self, time_cost: int = 3, memory_cost: int = 65536, parallelism: int = 4) -> None:
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+        self._hasher = Argon2PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            type=Type.ID,
+        )
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith("$argon2")
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return self._hasher.verify(hashed_password, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        try:
+            return self._hasher.check_needs_rehash(hashed_password)
+        except InvalidHashError:
+            return True
+
+
+class PasswordContext:
+    def __init__(self, default: PasswordHasher, hashers: list[PasswordHasher]) -> None:
+        """
+        Hash new passwords with ``default`` and verify hashes of any known scheme.
+        """
+        self.default = default
+        self.hashers = [default, *(hasher for hasher in hashers if hasher.scheme != default.scheme)]
+
+    def identify(self, hashed_password: str) -> PasswordHasher | None:
+        return next((hasher for hasher in self.hashers if hasher.identify(hashed_password)), None)
+
+    def hash(self, password: str) -> str:
+        return self.default.hash(password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        hasher = self.identify(hashed_password or "")
+        return hasher is not None and hasher.verify(password, hashed_password)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Verify a password and return a fresh hash if the stored one is outdated.
+        """
+        hasher = self.identify(hashed_password or "")
+        if hasher is None or not hasher.verify(password, hashed_password):
+            return False, None
+        if hasher is not self.default or hasher.needs_rehash(hashed_password):
+            return True, self.default.hash(password)
+        return True, None
+
+
+def build_password_context(settings: PasswordSettings) -> PasswordContext:
+    bcrypt_hasher = BcryptHasher(rounds=settings.bcrypt_rounds)
+    argon2_hasher = Argon2Hasher(
+        time_cost=settings.argon2_time_cost,
+        memory_cost=settings.argon2_memory_cost,
+        parallelism=settings.argon2_parallelism,
+    )
+    default = argon2_hasher if settings.scheme == "argon2" else bcrypt_hasher
+    return PasswordContext(default=default, hashers=[argon2_hasher, bcrypt_hasher])
+
+
+# Set in every pool worker by ``_init_worker`` so jobs only ship the password and hash.
+_worker_context: PasswordContext | None = None
+
+
+def _init_worker(context: PasswordContext) -> None:
+    global _worker_context
+    _worker_context = context
+
+
+def _get_worker_context() -> PasswordContext:
+    if _worker_context is None:
+        raise RuntimeError("Password worker is not initialized")
+    return _worker_context
+
+
+def _hash_password(password: str) -> str:
+    return _get_worker_context().hash(password)
+
+
+def _hash_passwords(passwords: list[str]) -> list[str]:
+    context = _get_worker_context()
+    return [context.hash(password) for password in passwords]
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return _get_worker_context().verify(password, hashed_password)
+
+
+def _verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return _get_worker_context().verify_and_update(password, hashed_password)
+
+
+class PasswordExecutor:
+    def __init__(self, context: PasswordContext, workers: int, queue_size: int, batch_size: int = 16) -> None:
+        """
+        Run password hashing in a process pool so it never blocks the event loop.
+
+        At most ``workers + queue_size`` jobs may be in flight; further jobs are
+        rejected with ``PasswordHasherBusyError`` (HTTP 503) instead of piling up.
+        Bulk hashing is split into jobs of ``batch_size`` passwords.
+        """
+        self.context = context
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self.batch_size = batch_size
+        self._pending = 0
+        self._pool: ProcessPoolExecutor | None = None
+        # The pool runs jobs in FIFO order; keeping one worker free of bulk jobs
+        # lets logins and signups start while an import is hashing.
+        self._bulk_slots = asyncio.Semaphore(max(1, workers - 1))
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.context,),
+            )
+        return self._pool
+
+    async def _run(self, operation: str, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusyError()
+
+        metrics = get_metrics()
+        self._pending += 1
+        metrics.password_hash_queue_depth.set(self._pending)
+        start_time = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+        except BrokenProcessPool:
+            # A worker died; drop the pool so the next job starts a fresh one.
+            self._pool = None
+            raise
+        finally:
+            self._pending -= 1
+            metrics.password_hash_queue_depth.set(self._pending)
+            metrics.password_hash_latency.labels(operation=operation).observe(time.perf_counter() - start_time)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash_password, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hash a batch of passwords in jobs of ``batch_size``, preserving order.
+
+        At most ``workers - 1`` of these jobs (but at least one) run at a time, so
+        an interactive job waits for no more than one bulk job.
+        """
+
+        async def hash_chunk(chunk: list[str]) -> list[str]:
+            async with self._bulk_slots:
+                return await self._run("hash_many", _hash_passwords, chunk)
+
+        chunks = [passwords[i : i + self.batch_size] for i in range(0, len(passwords), self.batch_size)]
+        results = await asyncio.gather(*(hash_chunk(chunk) for chunk in chunks))
+        return [hashed for chunk in results for hashed in chunk]
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", _verify_password, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await self._run("verify", _verify_and_update_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def calibrate(hasher_factory: Callable[[int], PasswordHasher], start: int, stop: int, target_ms: float) -> int:
+    """
+    Return the smallest cost in ``[start, stop]`` whose hash time reaches ``target_ms``.
+
+    Falls back to ``stop`` when even the highest cost is faster than the target.
+    """
+    for cost in range(start, stop + 1):
+        hasher = hasher_factory(cost)
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= target_ms:
+            return cost
+    return stop
+
+
+@cache
+def get_password_executor() -> PasswordExecutor:
+    return PasswordExecutor(
+        context=build_password_context(password_settings),
+        workers=password_settings.hash_workers,
+        queue_size=password_settings.hash_queue_size,
+        batch_size=password_settings.hash_batch_size,
+    )
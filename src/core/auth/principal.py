@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from functools import cache
+
+from core.constants.role import UserRole
+from core.prometheus import get_metrics
+from core.settings import jwt_settings
+from db.models.user import User
+
+
+class Principal:
+    """Compact authorization record for an authenticated user."""
+
+    __slots__ = ("id", "role", "is_verified", "token_version")
+
+    def __init__(self, id: int, role: UserRole, is_verified: bool, token_version: int) -> None:
+        self.id = id
+        self.role = role
+        self.is_verified = is_verified
+        self.token_version = token_version
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, role=user.role, is_verified=user.is_verified, token_version=user.token_version)
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        In-process LRU cache of principals keyed by user id, with a TTL per entry.
+
+        Entries are dropped by ``invalidate`` on writes in this process; other
+        processes see the change once their entry expires.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+
+    def get(self, user_id: int) -> Principal | None:
+        metrics = get_metrics()
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            metrics.principal_cache_misses.inc()
+            return None
+
+        self._entries.move_to_end(user_id)
+        metrics.principal_cache_hits.inc()
+        return entry[1]
+
+    def set(self, principal: Principal) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@cache
+def get_principal_cache() -> PrincipalCache:
+    return PrincipalCache(
+        maxsize=jwt_settings.principal_cache_size,
+        ttl=jwt_settings.principal_cache_ttl,
+    )
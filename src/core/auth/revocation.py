@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import math
+from datetime import datetime
+from functools import cache
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.prometheus import get_metrics
+from core.settings import jwt_settings
+from db.crud.revoked_token import RevokedTokenCRUD
+
+
+def revoked_user_key(user_id: int) -> str:
+    """Denylist entry that revokes every access token of a deleted user."""
+    return f"user:{user_id}"
+
+
+def revoked_version_key(user_id: int, version: int) -> str:
+    """Denylist entry that revokes the access tokens of a user issued with token ``version``."""
+    return f"v:{user_id}:{version}"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        """
+        Bit-array Bloom filter sized for ``capacity`` items at ``false_positive_rate``.
+        """
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Expected false-positive rate for the current number of items."""
+        return float((1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count)
+
+
+class RevocationList:
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        """
+        Per-process Bloom filter mirror of the ``revoked_token`` table.
+
+        A negative answer from ``might_be_revoked`` is definitive and costs no I/O;
+        a positive one must be confirmed against the database. Revocations made in
+        other processes become visible here after the next ``rebuild``.
+        """
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self._filter = BloomFilter(capacity, false_positive_rate)
+        self._recent: list[str] = []
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return jti in self._filter
+
+    async def revoke(self, crud: RevokedTokenCRUD, jti: str, expires_at: datetime) -> None:
+        await crud.revoke(jti, expires_at)
+        self._filter.add(jti)
+        self._recent.append(jti)
+        self._report()
+
+    async def rebuild(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._recent = []
+        async with session_factory() as session:
+            jtis = [jti async for jti in RevokedTokenCRUD(session=session).iter_active()]
+
+        bloom_filter = BloomFilter(max(self.capacity, len(jtis) * 2), self.false_positive_rate)
+        # Local revocations committed while the snapshot was loading may be missing from it.
+        for jti in [*jtis, *self._recent]:
+            bloom_filter.add(jti)
+        self._filter = bloom_filter
+        self._report()
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession], interval: float) -> None:
+        while True:
+            try:
+                await self.rebuild(session_factory)
+            except Exception as e:
+                logger.error(f"Revocation list rebuild failed: {e}")
+            await asyncio.sleep(interval)
+
+    def _report(self) -> None:
+        metrics = get_metrics()
+        metrics.revocation_filter_memory.set(self._filter.memory_bytes)
+        metrics.revocation_filter_false_positive_rate.set(self._filter.false_positive_rate)
+
+
+@cache
+def get_revocation_list() -> RevocationList:
+    return RevocationList(
+        capacity=jwt_settings.revocation_filter_capacity,
+        false_positive_rate=jwt_settings.revocation_filter_fp_rate,
+    )
@@ -1,6 +1,12 @@
+from typing import Any
+
+from billiard.process import current_process
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from prometheus_client import start_http_server
 
 from core.settings import redis_settings, settings
+from core.smtp import close_smtp_sender
 
 celery_app = Celery(
     settings.app_name,
@@ -9,6 +15,7 @@ celery_app = Celery(
     include=[
         "core.celery.tasks.confirm",
         "core.celery.tasks.delete_unverified",
+        "core.celery.tasks.tokens",
     ],
 )
 
@@ -26,7 +33,33 @@ celery_app.conf.update(
     beat_schedule={
         "cleanup_old_unverified_users": {
             "task": "cleanup_old_unverified_users",
-            "schedule": 60.0,  # every day at midnight
+            "schedule": 60.0,  # every minute, in small batches
+        },
+        "purge_expired_refresh_tokens": {
+            "task": "purge_expired_refresh_tokens",
+            "schedule": 60.0 * 60,  # every hour
+        },
+        "purge_expired_revoked_tokens": {
+            "task": "purge_expired_revoked_tokens",
+            "schedule": 60.0 * 60,  # every hour
         },
     },
 )
+
+
+@worker_process_init.connect  # type: ignore
+def start_metrics_server(**kwargs: Any) -> None:
+    """
+    Expose the worker process's metrics (e.g. cleanup batches) for scraping.
+
+    Pool processes listen on consecutive ports starting at CELERY_METRICS_PORT.
+    """
+    if settings.celery_metrics_port is not None:
+        start_http_server(settings.celery_metrics_port + getattr(current_process(), "index", 0))
+
+
+@worker_process_shutdown.connect  # type: ignore
+@worker_shutdown.connect  # type: ignore
+def close_smtp_connections(**kwargs: Any) -> None:
+    """Say QUIT on the pooled SMTP connections of the exiting process."""
+    close_smtp_sender()
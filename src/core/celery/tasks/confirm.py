@@ -1,10 +1,8 @@
-import asyncio
 from datetime import UTC, datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from pathlib import Path
 
-from aiosmtplib import send
 from celery import Task
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from loguru import logger
@@ -12,6 +10,7 @@ from pydantic import EmailStr
 
 from core.celery.app import celery_app
 from core.settings import settings, smtp_settings
+from core.smtp import get_smtp_sender
 
 
 def render_template(template_name: str, context: dict) -> str:
@@ -39,12 +38,10 @@ def render_template(template_name: str, context: dict) -> str:
 def send_confirm_task(self: Task, email: EmailStr, code: int) -> None:
     """
     Celery task to send confirmation email.
-    Runs synchronously in Celery worker, but internally uses async SMTP send.
+    Runs synchronously in Celery worker, over the process's pooled SMTP connections.
     """
     try:
         from_email = smtp_settings.sender_email
-        smtp_host = smtp_settings.host
-        smtp_port = smtp_settings.port
         smtp_user = smtp_settings.user
         smtp_password = smtp_settings.password
 
@@ -71,17 +68,7 @@ def send_confirm_task(self: Task, email: EmailStr, code: int) -> None:
         message.attach(MIMEText(text_content, "plain"))
         message.attach(MIMEText(html_content, "html"))
 
-        # Run async send inside sync Celery task
-        asyncio.run(
-            send(
-                message,
-                hostname=smtp_host,
-                port=smtp_port,
-                username=smtp_user,
-                password=smtp_password,
-                start_tls=True,
-            )
-        )
+        get_smtp_sender().send(message, timeout=smtp_settings.timeout * 2)
 
         logger.info(f"Confirmation email successfully sent to {email}")
 
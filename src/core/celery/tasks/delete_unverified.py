@@ -5,6 +5,7 @@ from loguru import logger
 
 from core.celery.app import celery_app
 from core.database import get_session_factory
+from db.crud.confirm import PostgresConfirmCodeStore
 from db.crud.user import UserCRUD
 from services.confirm import ConfirmService
 
@@ -12,16 +13,19 @@ from services.confirm import ConfirmService
 @celery_app.task(name="cleanup_old_unverified_users")  # type: ignore
 def cleanup_old_unverified_users() -> None:
     """
-    Celery task: delete unverified users older than 2 days.
+    Celery task: delete unverified users older than 2 days, then the confirmation
+    codes left without a user or long expired.
     """
 
-    async def _run() -> None:
+    async def _run() -> tuple[int, int]:
         session_factory = get_session_factory()
         async with session_factory() as session:
             confirm_service = ConfirmService()
             crud = UserCRUD(session=session, confirm_service=confirm_service)
-            await crud.delete_old_unverified_users()
+            users = await crud.delete_old_unverified_users()
+            codes = await PostgresConfirmCodeStore(session).purge_stale()
+            return users, codes
 
     logger.info("Celery task started: cleanup_old_unverified_users")
-    asyncio.run(_run())
-    logger.info("Celery task finished: cleanup_old_unverified_users")
+    users, codes = asyncio.run(_run())
+    logger.info(f"Celery task finished: cleanup_old_unverified_users, deleted {users} users and {codes} codes")
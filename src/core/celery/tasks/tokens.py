@@ -0,0 +1,40 @@
+import asyncio
+
+from loguru import logger
+
+from core.celery.app import celery_app
+from core.database import get_session_factory
+from db.crud.refresh_token import RefreshTokenCRUD
+from db.crud.revoked_token import RevokedTokenCRUD
+
+
+@celery_app.task(name="purge_expired_refresh_tokens")  # type: ignore
+def purge_expired_refresh_tokens() -> None:
+    """
+    Celery task: delete expired refresh tokens in batches.
+    """
+
+    async def _run() -> int:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            return await RefreshTokenCRUD(session=session).purge_expired()
+
+    logger.info("Celery task started: purge_expired_refresh_tokens")
+    deleted = asyncio.run(_run())
+    logger.info(f"Celery task finished: purge_expired_refresh_tokens, deleted {deleted} tokens")
+
+
+@celery_app.task(name="purge_expired_revoked_tokens")  # type: ignore
+def purge_expired_revoked_tokens() -> None:
+    """
+    Celery task: delete denylist entries of tokens that have expired anyway.
+    """
+
+    async def _run() -> int:
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            return await RevokedTokenCRUD(session=session).purge_expired()
+
+    logger.info("Celery task started: purge_expired_revoked_tokens")
+    deleted = asyncio.run(_run())
+    logger.info(f"Celery task finished: purge_expired_revoked_tokens, deleted {deleted} entries")
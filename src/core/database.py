@@ -1,24 +1,188 @@
+import asyncio
+import math
+import os
+import time
 from functools import cache
+from typing import Any
+from uuid import uuid4
 
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.engine import ExceptionContext
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, NullPool, QueuePool
+from starlette.responses import Response
 
-from core.settings import settings
+from core.prometheus import get_metrics
+from core.settings import Settings, settings
+from core.statements import SlowQueryLog, instrument_statements
+
+# Cookie holding the Unix time of the client's last write; see ReplicaRouter.
+LAST_WRITE_COOKIE = "last_write"
+
+# Seconds the replica is behind the primary; 0 while it has replayed everything it received.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+# ``record_info`` key of the time the pending checkout of a connection waited in the pool.
+_CHECKOUT_WAIT_KEY = "checkout_wait"
+
+
+def _pool_labels(name: str) -> dict[str, str]:
+    return {"pool": name, "worker": str(os.getpid())}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times how long each checkout waits for a connection.
+
+    SQLAlchemy emits an event when a checkout ends, but none when it starts, so
+    the wait for a free or a new overflow connection is timed here, around
+    ``_do_get``, the only step of a checkout that blocks. The time is left on
+    the connection record for the ``checkout`` listener of ``instrument_engine``.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        record = super()._do_get()
+        # record_info outlives a reconnect after a failed pre-ping, unlike info.
+        if record.record_info is not None:
+            record.record_info[_CHECKOUT_WAIT_KEY] = time.perf_counter() - started
+        return record
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """
+    Export pool occupancy, checkout wait, connection age and ``pool_pre_ping`` failures of ``engine``.
+
+    Checked-out and overflow connections are counted from pool events, which
+    SQLAlchemy keeps on the engine when ``dispose()`` replaces the pool.
+    """
+    sync_engine = engine.sync_engine
+    pool_size = sync_engine.pool.size() if isinstance(sync_engine.pool, QueuePool) else None
+    open_connections = 0
+
+    def _report_overflow() -> None:
+        if pool_size is not None:
+            get_metrics().db_pool_overflow.labels(**_pool_labels(name)).set(max(open_connections - pool_size, 0))
+
+    @event.listens_for(sync_engine, "connect")
+    def _connect(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        nonlocal open_connections
+        record.info["connected_at"] = time.monotonic()
+        open_connections += 1
+        _report_overflow()
+
+    @event.listens_for(sync_engine, "close")
+    def _close(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        nonlocal open_connections
+        open_connections -= 1
+        _report_overflow()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _checkout(dbapi_connection: Any, record: ConnectionPoolEntry, proxy: Any) -> None:
+        metrics = get_metrics()
+        labels = _pool_labels(name)
+        metrics.db_pool_checked_out.labels(**labels).inc()
+        wait = record.record_info.pop(_CHECKOUT_WAIT_KEY, None) if record.record_info is not None else None
+        if wait is not None:
+            metrics.db_pool_checkout_wait.labels(**labels).observe(wait)
+        age = time.monotonic() - record.info.get("connected_at", time.monotonic())
+        metrics.db_pool_connection_age.labels(**labels).observe(age)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _checkin(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        get_metrics().db_pool_checked_out.labels(**_pool_labels(name)).dec()
+
+    @event.listens_for(sync_engine, "detach")
+    def _detach(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        # The connection leaves the pool while checked out and is never checked in.
+        nonlocal open_connections
+        open_connections -= 1
+        get_metrics().db_pool_checked_out.labels(**_pool_labels(name)).dec()
+        _report_overflow()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(context: ExceptionContext) -> None:
+        if context.is_pre_ping:
+            get_metrics().db_pool_pre_ping_failures.labels(**_pool_labels(name)).inc()
+
+
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def pooler_connect_args(settings: Settings) -> dict[str, Any]:
+    """
+    asyncpg connection arguments for the configured ``postgres_pooler``.
+
+    Behind a transaction pooler a server connection is shared between clients
+    between transactions, so a statement prepared by one client may be missing,
+    or already exist under the same name, for the next one. Nothing is cached
+    across transactions and every statement is prepared under a unique name.
+    """
+    if settings.postgres_pooler == "none":
+        return {}
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": _prepared_statement_name,
+    }
+
+
+def engine_options(settings: Settings) -> dict[str, Any]:
+    """Keyword arguments of ``create_async_engine`` for the configured pool and pooler."""
+    options: dict[str, Any] = {
+        "echo": settings.postgres_echo,
+        "connect_args": pooler_connect_args(settings),
+    }
+    if settings.postgres_null_pool:
+        return {**options, "poolclass": NullPool}
+    return {
+        **options,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.postgres_pool_size,
+        "max_overflow": settings.postgres_max_overflow,
+        "pool_timeout": settings.postgres_pool_timeout,
+        "pool_recycle": settings.postgres_pool_recycle,
+        "pool_pre_ping": True,
+        "pool_use_lifo": True,
+    }
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(url, pool_logging_name=name, **engine_options(settings))
+    instrument_engine(engine, name)
+    instrument_statements(engine)
+    if settings.postgres_slow_query_threshold is not None:
+        SlowQueryLog(
+            engine,
+            threshold=settings.postgres_slow_query_threshold,
+            max_per_minute=settings.postgres_slow_query_log_per_minute,
+            explain=settings.postgres_slow_query_explain,
+            explain_interval=settings.postgres_slow_query_explain_interval,
+        ).install()
+    return engine
 
 
 @cache
 def get_db_engine() -> AsyncEngine:
-    return create_async_engine(
-        settings.postgres_url,
-        echo=settings.postgres_echo,
-        pool_size=20,
-        pool_pre_ping=True,
-        pool_use_lifo=True,
-    )
+    return _create_engine(settings.postgres_url, "primary")
+
+
+@cache
+def get_replica_engine() -> AsyncEngine | None:
+    if not settings.postgres_replica_url:
+        return None
+    return _create_engine(settings.postgres_replica_url, "replica")
 
 
 @cache
@@ -28,3 +192,76 @@ def get_session_factory() -> async_sessionmaker[AsyncSession]:
         engine,
         expire_on_commit=False,
     )
+
+
+@cache
+def get_replica_session_factory() -> async_sessionmaker[AsyncSession] | None:
+    engine = get_replica_engine()
+    if engine is None:
+        return None
+    return async_sessionmaker(
+        engine,
+        expire_on_commit=False,
+    )
+
+
+class ReplicaRouter:
+    def __init__(self, read_your_writes_window: float, max_lag: float) -> None:
+        """
+        Decide whether a read-only request may be served by the replica.
+
+        A client that wrote within ``read_your_writes_window`` seconds reads from
+        the primary so it sees its own changes; everyone reads from the primary
+        while the measured replica lag exceeds ``max_lag``. The time of a client's
+        last write travels with the client in the ``LAST_WRITE_COOKIE`` cookie, so
+        the window holds whichever worker or instance serves its next request.
+        """
+        self.read_your_writes_window = read_your_writes_window
+        self.max_lag = max_lag
+        self.lag = 0.0
+
+    def mark_write(self, response: Response) -> None:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=math.ceil(self.read_your_writes_window),
+            httponly=True,
+            samesite="lax",
+        )
+
+    def wrote_recently(self, last_write: str | None) -> bool:
+        """Whether ``last_write``, the value of ``LAST_WRITE_COOKIE``, is within the window."""
+        try:
+            written_at = float(last_write or "")
+        except ValueError:
+            return False
+        # The cookie is client-controlled: a timestamp in the future beyond the
+        # window, e.g. forged to pin reads to the primary, is ignored.
+        return abs(time.time() - written_at) < self.read_your_writes_window
+
+    def use_replica(self, last_write: str | None) -> bool:
+        return self.lag <= self.max_lag and not self.wrote_recently(last_write)
+
+    async def measure_lag(self, engine: AsyncEngine) -> float:
+        async with engine.connect() as connection:
+            self.lag = float(await connection.scalar(REPLICA_LAG_QUERY) or 0)
+        get_metrics().replica_lag.set(self.lag)
+        return self.lag
+
+    async def run(self, engine: AsyncEngine, interval: float) -> None:
+        while True:
+            try:
+                await self.measure_lag(engine)
+            except Exception as e:
+                # An unreachable replica must not serve reads.
+                self.lag = float("inf")
+                logger.error(f"Replica lag check failed: {e}")
+            await asyncio.sleep(interval)
+
+
+@cache
+def get_replica_router() -> ReplicaRouter:
+    return ReplicaRouter(
+        read_your_writes_window=settings.postgres_replica_read_your_writes_window,
+        max_lag=settings.postgres_replica_max_lag,
+    )
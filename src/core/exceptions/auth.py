@@ -25,3 +25,11 @@ class InvalidRefreshTokenError(APIException):
     status_code = status.HTTP_401_UNAUTHORIZED
     default_code = "invalid_refresh_token"
     default_detail = "Invalid refresh token"
+
+
+class PasswordHasherBusyError(APIException):
+    """Raised when the password hashing queue is full."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_code = "password_hasher_busy"
+    default_detail = "Server is busy, please try again later"
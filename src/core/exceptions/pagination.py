@@ -0,0 +1,9 @@
+from fastapi import status
+
+from core.exceptions.base import APIException
+
+
+class InvalidCursorError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = "invalid_cursor"
+    default_detail = "Invalid pagination cursor"
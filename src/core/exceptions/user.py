@@ -13,3 +13,9 @@ class UserAlreadyRegistered(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_code = "user_already_registered"
     default_detail = "User with this email already exists"
+
+
+class UnsupportedImportFormat(APIException):
+    status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    default_code = "unsupported_import_format"
+    default_detail = "Send text/csv or application/x-ndjson"
@@ -1,16 +1,38 @@
+import asyncio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from core.database import get_db_engine
+from core.auth.password import get_password_executor
+from core.auth.revocation import get_revocation_list
+from core.database import get_db_engine, get_replica_engine, get_replica_router, get_session_factory
+from core.redis import get_redis
 from core.requests import get_http_transport
+from core.settings import confirm_settings, jwt_settings, settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     db_engine = get_db_engine()
     http_transport = get_http_transport()
+    revocation_task = asyncio.create_task(
+        get_revocation_list().run(get_session_factory(), jwt_settings.revocation_refresh_interval)
+    )
+    replica_engine = get_replica_engine()
+    replica_lag_task = None
+    if replica_engine is not None:
+        replica_lag_task = asyncio.create_task(
+            get_replica_router().run(replica_engine, settings.postgres_replica_lag_interval)
+        )
     yield
+    revocation_task.cancel()
+    if replica_lag_task is not None:
+        replica_lag_task.cancel()
+    if replica_engine is not None:
+        await replica_engine.dispose()
     await db_engine.dispose()
     await http_transport.aclose()
+    if confirm_settings.store == "redis":
+        await get_redis().aclose()
+    get_password_executor().shutdown()
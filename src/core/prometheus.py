@@ -1,19 +1,51 @@
 import time
 from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
 from dataclasses import dataclass
 from functools import cache
 
 from fastapi import Request, Response
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from core.settings import get_settings
 
 
+@dataclass
+class RequestQueries:
+    """SQL statements executed while handling one request."""
+
+    endpoint: str
+    count: int = 0
+
+
+# Set by MetricsMiddleware for each API request and counted by core.statements.
+request_queries: ContextVar[RequestQueries | None] = ContextVar("request_queries", default=None)
+
+
 @dataclass
 class Metrics:
     request_count: Counter
     request_latency: Histogram
+    request_query_count: Histogram
+    password_hash_queue_depth: Gauge
+    password_hash_latency: Histogram
+    principal_cache_hits: Counter
+    principal_cache_misses: Counter
+    revocation_filter_memory: Gauge
+    revocation_filter_false_positive_rate: Gauge
+    replica_lag: Gauge
+    cleanup_rows_deleted: Counter
+    cleanup_batch_duration: Histogram
+    db_pool_checked_out: Gauge
+    db_pool_overflow: Gauge
+    db_pool_checkout_wait: Histogram
+    db_pool_connection_age: Histogram
+    db_pool_pre_ping_failures: Counter
+    sql_statement_latency: Histogram
+    sql_statement_rows: Histogram
+    sql_statement_info: Gauge
+    sql_slow_statements: Counter
 
 
 @cache
@@ -30,13 +62,112 @@ def get_metrics() -> Metrics:
             "Latency of requests in seconds",
             ["method", "endpoint"],
         ),
+        request_query_count=Histogram(
+            f"{settings.app_name}_request_query_count",
+            "Number of SQL statements executed per request",
+            ["method", "endpoint"],
+            buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50, 100),
+        ),
+        password_hash_queue_depth=Gauge(
+            f"{settings.app_name}_password_hash_queue_depth",
+            "Number of password hashing jobs queued or running in the process pool",
+        ),
+        password_hash_latency=Histogram(
+            f"{settings.app_name}_password_hash_latency_seconds",
+            "Latency of password hashing jobs in seconds, including queue wait",
+            ["operation"],
+        ),
+        principal_cache_hits=Counter(
+            f"{settings.app_name}_principal_cache_hits",
+            "Number of get_current_user lookups served from the principal cache",
+        ),
+        principal_cache_misses=Counter(
+            f"{settings.app_name}_principal_cache_misses",
+            "Number of get_current_user lookups that went to the database",
+        ),
+        revocation_filter_memory=Gauge(
+            f"{settings.app_name}_revocation_filter_memory_bytes",
+            "Memory used by the revoked-token Bloom filter",
+        ),
+        revocation_filter_false_positive_rate=Gauge(
+            f"{settings.app_name}_revocation_filter_false_positive_rate",
+            "Expected false-positive rate of the revoked-token Bloom filter",
+        ),
+        replica_lag=Gauge(
+            f"{settings.app_name}_replica_lag_seconds",
+            "Replication lag of the read replica",
+        ),
+        cleanup_rows_deleted=Counter(
+            f"{settings.app_name}_cleanup_rows_deleted",
+            "Number of rows deleted by the batched cleanup jobs",
+            ["table"],
+        ),
+        cleanup_batch_duration=Histogram(
+            f"{settings.app_name}_cleanup_batch_duration_seconds",
+            "Duration of one cleanup batch, including its commit",
+            ["table"],
+        ),
+        db_pool_checked_out=Gauge(
+            f"{settings.app_name}_db_pool_checked_out",
+            "Number of connections checked out of the SQLAlchemy pool",
+            ["pool", "worker"],
+        ),
+        db_pool_overflow=Gauge(
+            f"{settings.app_name}_db_pool_overflow",
+            "Number of connections open beyond the pool size",
+            ["pool", "worker"],
+        ),
+        db_pool_checkout_wait=Histogram(
+            f"{settings.app_name}_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled connection, including opening a new one",
+            ["pool", "worker"],
+            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+        ),
+        db_pool_connection_age=Histogram(
+            f"{settings.app_name}_db_pool_connection_age_seconds",
+            "Age of connections when they are checked out of the pool",
+            ["pool", "worker"],
+            buckets=(1, 10, 60, 300, 900, 1800, 3600, 7200, 21600, 86400),
+        ),
+        db_pool_pre_ping_failures=Counter(
+            f"{settings.app_name}_db_pool_pre_ping_failures",
+            "Number of pooled connections found dead by pool_pre_ping",
+            ["pool", "worker"],
+        ),
+        sql_statement_latency=Histogram(
+            f"{settings.app_name}_sql_statement_latency_seconds",
+            "Latency of SQL statements in seconds, by statement fingerprint",
+            ["fingerprint"],
+            buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+        ),
+        sql_statement_rows=Histogram(
+            f"{settings.app_name}_sql_statement_rows",
+            "Rows returned or affected by SQL statements, by statement fingerprint",
+            ["fingerprint"],
+            buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000),
+        ),
+        sql_statement_info=Gauge(
+            f"{settings.app_name}_sql_statement_info",
+            "Normalized SQL text of each statement fingerprint",
+            ["fingerprint", "statement"],
+        ),
+        sql_slow_statements=Counter(
+            f"{settings.app_name}_sql_slow_statements",
+            "Number of SQL statements slower than the slow-query threshold, logged or not",
+            ["fingerprint"],
+        ),
     )
 
 
 class MetricsMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
         start_time = time.time()
-        response = await call_next(request)
+        queries = RequestQueries(endpoint=f"{request.method} {request.url.path}")
+        token = request_queries.set(queries)
+        try:
+            response = await call_next(request)
+        finally:
+            request_queries.reset(token)
         if not request.url.path.startswith("/api"):
             return response
 
@@ -46,5 +177,6 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         metrics = get_metrics()
         metrics.request_count.labels(**labels).inc()
         metrics.request_latency.labels(**labels).observe(process_time)
+        metrics.request_query_count.labels(**labels).observe(queries.count)
 
         return response
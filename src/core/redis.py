@@ -0,0 +1,10 @@
+from functools import cache
+
+from redis.asyncio import Redis
+
+from core.settings import redis_settings
+
+
+@cache
+def get_redis() -> Redis:
+    return Redis.from_url(redis_settings.url, decode_responses=True)
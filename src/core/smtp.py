@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from email.message import Message
+from functools import cache
+from typing import Any
+
+from aiosmtplib import SMTP, SMTPResponseException
+from loguru import logger
+
+from core.settings import SMTPSettings, smtp_settings
+
+# Reply code of a server that is closing the connection, e.g. after too many messages.
+SERVICE_NOT_AVAILABLE = 421
+
+
+def _is_disconnect(error: BaseException) -> bool:
+    return isinstance(error, ConnectionError) or (
+        isinstance(error, SMTPResponseException) and error.code == SERVICE_NOT_AVAILABLE
+    )
+
+
+class SMTPPool:
+    def __init__(self, max_size: int, max_idle: float, **options: Any) -> None:
+        """
+        Authenticated ``aiosmtplib`` connections reused across messages.
+
+        ``options`` are passed to ``aiosmtplib.SMTP``; connecting runs STARTTLS and
+        AUTH once per connection. At most ``max_size`` connections are open and
+        further senders wait for one. A connection idle for longer than ``max_idle``
+        seconds is checked with NOOP before reuse, and a message that fails because
+        a reused connection was dropped is sent again on a new one.
+        """
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.options = options
+        self._slots = asyncio.Semaphore(max_size)
+        self._idle: list[tuple[SMTP, float]] = []
+
+    async def _connect(self) -> SMTP:
+        client = SMTP(**self.options)
+        await client.connect()
+        return client
+
+    async def _acquire(self) -> tuple[SMTP, bool]:
+        """Return an idle connection that still works, or a new one; and whether it was reused."""
+        while self._idle:
+            client, released_at = self._idle.pop()
+            if not client.is_connected:
+                continue
+            if time.monotonic() - released_at < self.max_idle:
+                return client, True
+            try:
+                await client.noop()
+            except Exception:
+                client.close()
+                continue
+            return client, True
+        return await self._connect(), False
+
+    async def send(self, message: Message) -> None:
+        async with self._slots:
+            client, reused = await self._acquire()
+            try:
+                await client.send_message(message)
+            except BaseException as e:
+                client.close()
+                if not (reused and _is_disconnect(e)):
+                    raise
+                logger.info(f"SMTP connection was dropped, reconnecting: {e}")
+                client = await self._connect()
+                try:
+                    await client.send_message(message)
+                except BaseException:
+                    client.close()
+                    raise
+            self._idle.append((client, time.monotonic()))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class SMTPSender:
+    def __init__(self, pool: SMTPPool) -> None:
+        """
+        Run ``pool`` on an event loop thread of its own, so that synchronous Celery
+        tasks of one worker process share its connections.
+        """
+        self.pool = pool
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="smtp-pool", daemon=True)
+        self._thread.start()
+
+    def send(self, message: Message, timeout: float | None = None) -> None:
+        future = asyncio.run_coroutine_threadsafe(self.pool.send(message), self._loop)
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self, timeout: float | None = None) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Closing SMTP connections failed: {e}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._loop.close()
+
+
+def build_smtp_pool(settings: SMTPSettings) -> SMTPPool:
+    return SMTPPool(
+        max_size=settings.pool_size,
+        max_idle=settings.pool_max_idle,
+        hostname=settings.host,
+        port=settings.port,
+        username=settings.user,
+        password=settings.password,
+        start_tls=settings.use_tls and not settings.use_ssl,
+        use_tls=settings.use_ssl,
+        timeout=settings.timeout,
+    )
+
+
+@cache
+def get_smtp_sender() -> SMTPSender:
+    """Per-process sender; created on first use, i.e. in the Celery pool process."""
+    return SMTPSender(build_smtp_pool(smtp_settings))
+
+
+def close_smtp_sender() -> None:
+    if get_smtp_sender.cache_info().currsize:
+        get_smtp_sender().close(timeout=smtp_settings.timeout)
+        get_smtp_sender.cache_clear()
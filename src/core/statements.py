@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import re
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.prometheus import get_metrics, request_queries
+
+_STARTED_KEY = "statement_started"
+_SLOW_STARTED_KEY = "slow_statement_started"
+
+# Upper bound for capturing one plan; EXPLAIN ANALYZE runs the statement again.
+EXPLAIN_STATEMENT_TIMEOUT_MS = 30_000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+# IN lists and multi-row VALUES of one statement differ only in their length.
+_IN_LIST = re.compile(r"\bIN \(\?(?:::\w+)?(?:, ?\?(?:::\w+)?)*\)", re.IGNORECASE)
+_VALUES = re.compile(r"\bVALUES (\([^()]*\))(?:, ?\([^()]*\))*", re.IGNORECASE)
+# Plan lines that print bound values as constants, e.g. "Index Cond: (email = 'a@b.c'::text)".
+_PLAN_CONDITION = re.compile(r"^(?!\s*Rows Removed)(\s*[\w -]*(?:Cond|Filter): )(.*)$")
+_WRITE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b|\bFOR (?:KEY )?SHARE\b", re.IGNORECASE)
+
+
+def normalize(statement: str) -> str:
+    """Replace literals and parameters of ``statement`` with ``?`` and collapse lists of them."""
+    statement = _STRING.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _IN_LIST.sub("IN (?, ...)", statement)
+    return _VALUES.sub(r"VALUES \1, ...", statement)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Short stable identifier of ``statement`` with its literals and parameters removed.
+
+    The normalized text is exported once per fingerprint as ``sql_statement_info``.
+    """
+    normalized = normalize(statement)
+    digest = hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+    get_metrics().sql_statement_info.labels(fingerprint=digest, statement=normalized[:500]).set(1)
+    return digest
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    conn.info[_STARTED_KEY] = time.perf_counter()
+    queries = request_queries.get()
+    if queries is not None:
+        queries.count += 1
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    elapsed = time.perf_counter() - conn.info.pop(_STARTED_KEY, time.perf_counter())
+    metrics = get_metrics()
+    statement_fingerprint = fingerprint(statement)
+    metrics.sql_statement_latency.labels(fingerprint=statement_fingerprint).observe(elapsed)
+    if cursor.rowcount >= 0:
+        metrics.sql_statement_rows.labels(fingerprint=statement_fingerprint).observe(cursor.rowcount)
+
+
+def instrument_statements(engine: AsyncEngine) -> None:
+    """Export latency and row counts per statement fingerprint and count statements per request."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _shape(value: Any) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, str | bytes | list | tuple):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shapes(parameters: Any) -> str:
+    """Describe bound parameters by type and length, never by value."""
+    if isinstance(parameters, Mapping):
+        return "{" + ", ".join(f"{name}: {_shape(value)}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, list):
+        # executemany: one set of parameters per row.
+        return f"{len(parameters)} x {parameter_shapes(parameters[0])}" if parameters else "[]"
+    if isinstance(parameters, tuple):
+        return "(" + ", ".join(_shape(value) for value in parameters) + ")"
+    return _shape(parameters)
+
+
+def _mask_plan_line(line: str) -> str:
+    match = _PLAN_CONDITION.match(line)
+    if match is None:
+        return line
+    return match[1] + _NUMBER.sub("?", _STRING.sub("?", match[2]))
+
+
+def explain_prefix(statement: str) -> str:
+    """Reads are analyzed; writes only planned, so they are never executed twice."""
+    if statement.lstrip().upper().startswith(("SELECT", "WITH")) and not _WRITE.search(statement):
+        return "EXPLAIN (ANALYZE, BUFFERS) "
+    return "EXPLAIN "
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        threshold: float,
+        max_per_minute: int,
+        explain: bool = False,
+        explain_interval: float = 300,
+    ) -> None:
+        """
+        Log statements of ``engine`` slower than ``threshold`` seconds.
+
+        An entry carries the normalized statement, the shapes of its parameters
+        and the endpoint that issued it. At most ``max_per_minute`` entries are
+        written per minute; every slow statement is counted in ``sql_slow_statements``.
+        With ``explain`` the plan is captured on another connection of the engine
+        in a read-only transaction, one at a time and at most once per
+        ``explain_interval`` seconds for each fingerprint.
+        """
+        self.engine = engine
+        self.threshold = threshold
+        self.max_per_minute = max_per_minute
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._allowance = float(max_per_minute)
+        self._refilled_at = time.monotonic()
+        self._suppressed = 0
+        self._explained_at: dict[str, float] = {}
+        self._explaining: asyncio.Task[None] | None = None
+
+    def install(self) -> None:
+        sync_engine = self.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _take(self) -> bool:
+        now = time.monotonic()
+        refill = (now - self._refilled_at) * self.max_per_minute / 60
+        self._allowance = min(float(self.max_per_minute), self._allowance + refill)
+        self._refilled_at = now
+        if self._allowance < 1:
+            return False
+        self._allowance -= 1
+        return True
+
+    def _before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        conn.info[_SLOW_STARTED_KEY] = time.perf_counter()
+
+    def _after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info.pop(_SLOW_STARTED_KEY, time.perf_counter())
+        if elapsed < self.threshold or statement.startswith("EXPLAIN"):
+            return
+        statement_fingerprint = fingerprint(statement)
+        get_metrics().sql_slow_statements.labels(fingerprint=statement_fingerprint).inc()
+        if not self._take():
+            self._suppressed += 1
+            return
+
+        queries = request_queries.get()
+        suppressed = f" ({self._suppressed} more since the last entry)" if self._suppressed else ""
+        self._suppressed = 0
+        logger.warning(
+            f"Slow query {statement_fingerprint} took {elapsed * 1000:.0f} ms"
+            f" in {queries.endpoint if queries is not None else 'background'}{suppressed}:"
+            f" {normalize(statement)} parameters {parameter_shapes(parameters)}"
+        )
+        if self.explain and not executemany and self._may_explain(statement_fingerprint):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._explained_at[statement_fingerprint] = time.monotonic()
+            self._explaining = loop.create_task(self._log_plan(statement_fingerprint, statement, parameters))
+
+    def _may_explain(self, statement_fingerprint: str) -> bool:
+        if self._explaining is not None and not self._explaining.done():
+            return False
+        explained_at = self._explained_at.get(statement_fingerprint)
+        return explained_at is None or time.monotonic() - explained_at >= self.explain_interval
+
+    async def _log_plan(self, statement_fingerprint: str, statement: str, parameters: Any) -> None:
+        try:
+            async with self.engine.connect() as connection:
+                await connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+                await connection.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_STATEMENT_TIMEOUT_MS}")
+                result = await connection.exec_driver_sql(explain_prefix(statement) + statement, parameters)
+                plan = "\n".join(_mask_plan_line(row[0]) for row in result)
+        except Exception as e:
+            logger.warning(f"EXPLAIN of slow query {statement_fingerprint} failed: {e}")
+            return
+        logger.warning(f"Plan of slow query {statement_fingerprint}:\n{plan}")
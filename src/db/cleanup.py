@@ -0,0 +1,37 @@
+import time
+from typing import Any
+
+from sqlalchemy import ColumnElement, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from core.prometheus import get_metrics
+
+
+async def delete_in_batches(
+    session: AsyncSession,
+    primary_key: InstrumentedAttribute[Any],
+    where: ColumnElement[bool],
+    batch_size: int = 1000,
+) -> int:
+    """
+    Delete the rows matching ``where`` in batches, committing after each one.
+
+    Every batch is a short transaction that locks its rows with ``FOR UPDATE SKIP
+    LOCKED``, so rows held by live requests or a concurrent run are left for the
+    next run. Returns the number of deleted rows.
+    """
+    model = primary_key.class_
+    table = model.__tablename__
+    metrics = get_metrics()
+    total = 0
+    while True:
+        started = time.perf_counter()
+        batch = select(primary_key).where(where).limit(batch_size).with_for_update(skip_locked=True)
+        result = await session.execute(delete(model).where(primary_key.in_(batch)))
+        await session.commit()
+        metrics.cleanup_batch_duration.labels(table=table).observe(time.perf_counter() - started)
+        metrics.cleanup_rows_deleted.labels(table=table).inc(result.rowcount)
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
@@ -1,57 +1,139 @@
 from datetime import UTC, datetime, timedelta
+from typing import NoReturn, Protocol
 
 from fastapi import Depends
 from pydantic import EmailStr
-from sqlalchemy import select
+from sqlalchemy import and_, exists, func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.exceptions.confirm import ConfirmError
-from db.dependencies import get_db_session
-from db.models.confirm import ConfirmCode
+from core.settings import confirm_settings
+from db.cleanup import delete_in_batches
+from db.crud.confirm_redis import get_redis_confirm_code_store
+from db.dependencies import commit, get_db_session
+from db.models.confirm import ConfirmCode, format_remaining
+from db.models.user import User
+
+# Consumes a matching, unexpired, unblocked code, or else records the attempt the way
+# ConfirmCode.sync_limits does: a spent try allowance turns into a lock, lapsed locks
+# are cleared, and only wrong codes outside a lock or expiry count as a try.
+VERIFY_STATEMENT = text(
+    """
+    WITH confirmed AS (
+        DELETE FROM confirm_code
+        WHERE email = :email
+            AND code = :code
+            AND expire_time >= now()
+            AND (unlock_time IS NULL OR unlock_time <= now())
+            AND try_count < :try_limit
+        RETURNING id
+    ), attempted AS (
+        UPDATE confirm_code SET
+            try_count = CASE
+                WHEN try_count >= :try_limit THEN 0
+                WHEN expire_time < now() OR unlock_time > now() THEN try_count
+                ELSE try_count + 1
+            END,
+            unlock_time = CASE
+                WHEN try_count >= :try_limit THEN now() + make_interval(mins => :try_block)
+                WHEN unlock_time <= now() THEN NULL
+                ELSE unlock_time
+            END,
+            updated_at = now()
+        WHERE email = :email AND NOT EXISTS (SELECT FROM confirmed)
+        RETURNING coalesce(expire_time < now(), false) AS expired, unlock_time
+    )
+    SELECT true AS confirmed, false AS expired, NULL::timestamptz AS unlock_time FROM confirmed
+    UNION ALL
+    SELECT false, expired, unlock_time FROM attempted
+    """
+)
+
+
+class ConfirmCodeStore(Protocol):
+    async def prepare_and_save_code(self, email: EmailStr, code: int) -> None:
+        """Store a new code for ``email``, or raise ConfirmError while resending is blocked."""
 
+    async def verify_code(self, email: EmailStr, code: int) -> bool:
+        """Consume the code of ``email``, or raise ConfirmError if it is wrong, expired or blocked."""
 
-class ConfirmCodeCRUD:
-    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+
+class PostgresConfirmCodeStore:
+    def __init__(self, session: AsyncSession):
         self.session = session
 
+    async def _fail(self, error: ConfirmError) -> NoReturn:
+        # Attempt counters and lockouts must survive the rolled back error response.
+        await commit(self.session)
+        raise error
+
     async def get_or_create(self, email: EmailStr, code: int) -> ConfirmCode:
+        # The unique email index settles concurrent creations.
+        stmt = (
+            insert(ConfirmCode)
+            .values(email=email, code=code, try_count=0, resend_count=0)
+            .on_conflict_do_nothing(index_elements=[ConfirmCode.email])
+        )
+        await self.session.execute(stmt)
         result = await self.session.execute(select(ConfirmCode).where(ConfirmCode.email == email))
-        sms_confirm: ConfirmCode | None = result.scalars().first()
-
-        if sms_confirm is None:
-            sms_confirm = ConfirmCode(email=email, code=code)
-            self.session.add(sms_confirm)
-            await self.session.commit()
-            await self.session.refresh(sms_confirm)
-
-        return sms_confirm
+        return result.scalars().one()
+
+    async def purge_stale(self, batch_size: int = 1000) -> int:
+        """
+        Delete codes of users that no longer exist, and codes whose code and locks
+        all lapsed more than ``RESEND_BLOCK_MINUTES`` ago, so a purge never resets
+        a resend allowance sooner than its lock would have.
+        """
+        lapsed = func.greatest(ConfirmCode.expire_time, ConfirmCode.unlock_time, ConfirmCode.resend_unlock_time)
+        horizon = func.now() - timedelta(minutes=ConfirmCode.RESEND_BLOCK_MINUTES)
+        # Matches the partial ix_confirm_code_stale_after index.
+        stale = and_(ConfirmCode.expire_time.is_not(None), lapsed < horizon)
+        orphaned = ~exists().where(User.email == ConfirmCode.email)
+        deleted = await delete_in_batches(self.session, ConfirmCode.id, stale, batch_size)
+        return deleted + await delete_in_batches(self.session, ConfirmCode.id, orphaned, batch_size)
 
     # Новое: получить запись по email
     async def get_by_email(self, email: EmailStr) -> ConfirmCode | None:
         result = await self.session.execute(select(ConfirmCode).where(ConfirmCode.email == email))
         return result.scalars().first()
 
-    # Новое: гарантировать наличие записи (создать при отсутствии)
-    async def ensure_exists(self, email: EmailStr, code: int) -> ConfirmCode:
-        sms_confirm = await self.get_by_email(email)
-        if sms_confirm is None:
-            sms_confirm = ConfirmCode(email=email, code=code)
-            self.session.add(sms_confirm)
-            await self.session.commit()
-            await self.session.refresh(sms_confirm)
-        return sms_confirm
+    async def _insert_first_code(self, email: EmailStr, code: int) -> bool:
+        """
+        Insert the row of an email's first code; False if a concurrent request created it first.
+        """
+        now = datetime.now(UTC)
+        stmt = (
+            insert(ConfirmCode)
+            .values(
+                email=email,
+                code=code,
+                try_count=0,
+                resend_count=1,
+                expire_time=now + timedelta(seconds=ConfirmCode.SMS_EXPIRY_SECONDS),
+                resend_unlock_time=now + timedelta(seconds=ConfirmCode.SMS_EXPIRY_SECONDS),
+            )
+            .on_conflict_do_nothing(index_elements=[ConfirmCode.email])
+            .returning(ConfirmCode.id)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none() is not None
 
     # Новое: подготовка к отправке кода + сохранение лимитов/счетчиков
-    async def prepare_and_save_code(self, email: EmailStr, code: int) -> ConfirmCode:
-        sms_confirm = await self.ensure_exists(email, code)
+    async def prepare_and_save_code(self, email: EmailStr, code: int) -> None:
+        sms_confirm = await self.get_by_email(email)
+        if sms_confirm is None:
+            if await self._insert_first_code(email, code):
+                return
+            sms_confirm = await self.get_or_create(email, code)
 
         # Актуализируем лимиты (метод модели)
-        await sms_confirm.sync_limits(self.session)
+        await sms_confirm.sync_limits()
 
         # Проверка блокировки на повторную отправку
         if sms_confirm.resend_unlock_time is not None:
             expired = await sms_confirm.interval(sms_confirm.resend_unlock_time)
-            raise ConfirmError(f"Resend blocked, try again in {expired}", values={"expired": expired})
+            await self._fail(ConfirmError(f"Resend blocked, try again in {expired}", values={"expired": expired}))
 
         # Обновляем поля для нового кода
         sms_confirm.code = code
@@ -60,35 +142,50 @@ class ConfirmCodeCRUD:
         sms_confirm.expire_time = datetime.now(UTC) + timedelta(seconds=ConfirmCode.SMS_EXPIRY_SECONDS)
         sms_confirm.resend_unlock_time = datetime.now(UTC) + timedelta(seconds=ConfirmCode.SMS_EXPIRY_SECONDS)
 
-        self.session.add(sms_confirm)
-        await self.session.commit()
-        await self.session.refresh(sms_confirm)
-        return sms_confirm
-
     # Новое: проверка кода подтверждения
     async def verify_code(self, email: EmailStr, code: int) -> bool:
-        sms_confirm = await self.get_by_email(email)
-        if sms_confirm is None:
+        """
+        Check ``code`` and account for the attempt in one statement.
+
+        Row locks serialize concurrent attempts, so parallel guesses cannot get
+        past ``TRY_COUNT``. Resend limits are left to the send path.
+        """
+        result = await self.session.execute(
+            VERIFY_STATEMENT,
+            {
+                "email": email,
+                "code": code,
+                "try_limit": ConfirmCode.TRY_COUNT,
+                "try_block": ConfirmCode.TRY_BLOCK_MINUTES,
+            },
+        )
+        attempt = result.one_or_none()
+        if attempt is None:
             raise ConfirmError("Invalid confirmation code")
+        if attempt.confirmed:
+            return True
 
-        await sms_confirm.sync_limits(self.session)
+        if attempt.expired:
+            await self._fail(ConfirmError("Time for confirmation has expired"))
+        if attempt.unlock_time is not None:
+            await self._fail(ConfirmError(f"Try again in {format_remaining(attempt.unlock_time - datetime.now(UTC))}"))
+        await self._fail(ConfirmError("Invalid confirmation code"))
 
-        if await sms_confirm.is_expired():
-            raise ConfirmError("Time for confirmation has expired")
 
-        if await sms_confirm.is_block():
-            if sms_confirm.unlock_time is not None:
-                expired = await sms_confirm.interval(sms_confirm.unlock_time)
-                raise ConfirmError(f"Try again in {expired}")
-            else:
-                raise ConfirmError("Unlock time is not set")
+class ConfirmCodeCRUD:
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        """
+        Verification codes of the request, kept in the store selected by ``CONFIRM_STORE``.
+        """
+        self.session = session
+        self.store: ConfirmCodeStore
+        if confirm_settings.store == "redis":
+            self.store = get_redis_confirm_code_store()
+        else:
+            self.store = PostgresConfirmCodeStore(session)
 
-        if sms_confirm.code == code:
-            await self.session.delete(sms_confirm)
-            await self.session.commit()
-            return True
+    async def prepare_and_save_code(self, email: EmailStr, code: int) -> None:
+        await self.store.prepare_and_save_code(email, code)
 
-        sms_confirm.try_count += 1
-        self.session.add(sms_confirm)
-        await self.session.commit()
-        raise ConfirmError("Invalid confirmation code")
+    async def verify_code(self, email: EmailStr, code: int) -> bool:
+        return await self.store.verify_code(email, code)
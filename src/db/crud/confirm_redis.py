@@ -0,0 +1,121 @@
+from datetime import timedelta
+from functools import cache
+
+from pydantic import EmailStr
+from redis.asyncio import Redis
+
+from core.exceptions.confirm import ConfirmError
+from core.redis import get_redis
+from db.models.confirm import ConfirmCode, format_remaining
+
+# Every key of one email shares the {email} hash tag, so the scripts also run on Redis Cluster.
+KEY_PREFIX = "confirm"
+
+# Locks go first, mirroring ConfirmCode.sync_limits: a spent resend allowance turns into
+# a long lock. Otherwise a new code replaces the old one and the try counter starts over.
+# Returns the remaining lock in milliseconds, or 0 once the code is stored.
+PREPARE_SCRIPT = """
+local code_key, tries_key, resends_key, resend_lock_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local code, expiry, resend_limit, resend_block = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+
+if tonumber(redis.call('GET', resends_key) or '0') >= resend_limit then
+    redis.call('DEL', resends_key, tries_key)
+    redis.call('SET', resend_lock_key, 1, 'EX', resend_block)
+    return resend_block * 1000
+end
+local locked = redis.call('PTTL', resend_lock_key)
+if locked > 0 then
+    return locked
+end
+
+redis.call('SET', code_key, code, 'EX', expiry)
+redis.call('DEL', tries_key)
+redis.call('INCR', resends_key)
+redis.call('EXPIRE', resends_key, resend_block)
+redis.call('SET', resend_lock_key, 1, 'EX', expiry)
+return 0
+"""
+
+# Returns {status, lock milliseconds}; status is ok, expired, invalid or blocked. Wrong
+# codes bump the try counter, which expires together with the code it counts against.
+VERIFY_SCRIPT = """
+local code_key, tries_key, try_lock_key, resends_key, resend_lock_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local code, try_limit, try_block = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3])
+
+if tonumber(redis.call('GET', tries_key) or '0') >= try_limit then
+    redis.call('DEL', tries_key)
+    redis.call('SET', try_lock_key, 1, 'EX', try_block)
+end
+
+local stored = redis.call('GET', code_key)
+if not stored then
+    -- The resend counter outlives the code, so a missing code after a send has expired.
+    if redis.call('EXISTS', resends_key) == 1 then
+        return {'expired', 0}
+    end
+    return {'invalid', 0}
+end
+local locked = redis.call('PTTL', try_lock_key)
+if locked > 0 then
+    return {'blocked', locked}
+end
+
+if stored == code then
+    redis.call('DEL', code_key, tries_key, try_lock_key, resends_key, resend_lock_key)
+    return {'ok', 0}
+end
+redis.call('INCR', tries_key)
+redis.call('PEXPIRE', tries_key, redis.call('PTTL', code_key))
+return {'invalid', 0}
+"""
+
+
+def _keys(email: str, *names: str) -> list[str]:
+    return [f"{KEY_PREFIX}:{{{email}}}:{name}" for name in names]
+
+
+class RedisConfirmCodeStore:
+    def __init__(self, redis: Redis) -> None:
+        """
+        Verification codes and their limits kept in Redis instead of the ``confirm_code`` table.
+
+        Codes, counters and locks are separate keys that expire on their own, and
+        each operation is one Lua script, so concurrent attempts for the same email
+        cannot interleave between reading a counter and acting on it. Limits are the
+        ``ConfirmCode`` class constants.
+        """
+        self.redis = redis
+        self._prepare = redis.register_script(PREPARE_SCRIPT)
+        self._verify = redis.register_script(VERIFY_SCRIPT)
+
+    async def prepare_and_save_code(self, email: EmailStr, code: int) -> None:
+        locked = await self._prepare(
+            keys=_keys(email, "code", "tries", "resends", "resend_lock"),
+            args=[
+                code,
+                ConfirmCode.SMS_EXPIRY_SECONDS,
+                ConfirmCode.RESEND_COUNT,
+                ConfirmCode.RESEND_BLOCK_MINUTES * 60,
+            ],
+        )
+        if locked:
+            expired = format_remaining(timedelta(milliseconds=int(locked)))
+            raise ConfirmError(f"Resend blocked, try again in {expired}", values={"expired": expired})
+
+    async def verify_code(self, email: EmailStr, code: int) -> bool:
+        status, locked = await self._verify(
+            keys=_keys(email, "code", "tries", "try_lock", "resends", "resend_lock"),
+            args=[code, ConfirmCode.TRY_COUNT, ConfirmCode.TRY_BLOCK_MINUTES * 60],
+        )
+        if status == "ok":
+            return True
+        if status == "expired":
+            raise ConfirmError("Time for confirmation has expired")
+        if status == "blocked":
+            raise ConfirmError(f"Try again in {format_remaining(timedelta(milliseconds=int(locked)))}")
+        raise ConfirmError("Invalid confirmation code")
+
+
+@cache
+def get_redis_confirm_code_store() -> RedisConfirmCodeStore:
+    return RedisConfirmCodeStore(get_redis())
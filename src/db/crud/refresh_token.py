@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from db.cleanup import delete_in_batches
+from db.dependencies import commit, get_db_session
+from db.models.refresh_token import RefreshToken
+from db.models.user import User
+
+
+class RefreshTokenCRUD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, jti: str, family_id: str, user_id: int, expires_at: datetime) -> None:
+        await self.session.execute(
+            insert(RefreshToken).values(jti=jti, family_id=family_id, user_id=user_id, expires_at=expires_at)
+        )
+
+    async def use(self, jti: str) -> Row | None:
+        """
+        Mark an unused, unexpired token as used in a single statement.
+
+        Returns the token family together with the owner's principal fields,
+        or None if the token is unknown, expired or already used.
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.jti == jti,
+                RefreshToken.used.is_(False),
+                RefreshToken.expires_at > func.now(),
+                RefreshToken.user_id == User.id,
+            )
+            .values(used=True)
+            .returning(RefreshToken.family_id, User.id, User.role, User.is_verified, User.token_version)
+        )
+        result = await self.session.execute(stmt)
+        return result.one_or_none()
+
+    async def revoke_family(self, jti: str) -> None:
+        """
+        Delete every token in the family of ``jti`` (reuse detection).
+
+        Commits immediately so the revocation survives the error response.
+        """
+        family = select(RefreshToken.family_id).where(RefreshToken.jti == jti).scalar_subquery()
+        await self.session.execute(delete(RefreshToken).where(RefreshToken.family_id == family))
+        await commit(self.session)
+
+    async def delete_family(self, family_id: str) -> None:
+        """
+        Delete every token of the login session ``family_id`` (logout).
+        """
+        await self.session.execute(delete(RefreshToken).where(RefreshToken.family_id == family_id))
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete expired tokens in batches, committing after each one.
+        """
+        return await delete_in_batches(self.session, RefreshToken.jti, RefreshToken.expires_at < func.now(), batch_size)
+
+
+def get_refresh_token_crud(session: AsyncSession = Depends(get_db_session)) -> RefreshTokenCRUD:
+    return RefreshTokenCRUD(session=session)
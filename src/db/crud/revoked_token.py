@@ -0,0 +1,44 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from fastapi import Depends
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from db.cleanup import delete_in_batches
+from db.dependencies import get_db_session
+from db.models.revoked_token import RevokedToken
+
+
+class RevokedTokenCRUD:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        stmt = insert(RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing()
+        await self.session.execute(stmt)
+
+    async def is_revoked(self, jti: str) -> bool:
+        result = await self.session.execute(select(exists().where(RevokedToken.jti == jti)))
+        return bool(result.scalar())
+
+    async def iter_active(self) -> AsyncIterator[str]:
+        """
+        Stream jtis of revoked tokens that have not expired yet.
+        """
+        stmt = select(RevokedToken.jti).where(RevokedToken.expires_at > func.now())
+        result = await self.session.stream_scalars(stmt.execution_options(yield_per=5000))
+        async for jti in result:
+            yield jti
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        """
+        Delete expired entries in batches, committing after each one.
+        """
+        return await delete_in_batches(self.session, RevokedToken.jti, RevokedToken.expires_at < func.now(), batch_size)
+
+
+def get_revoked_token_crud(session: AsyncSession = Depends(get_db_session)) -> RevokedTokenCRUD:
+    return RevokedTokenCRUD(session=session)
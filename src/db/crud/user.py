@@ -1,17 +1,39 @@
 from datetime import UTC, datetime, timedelta
+from typing import Any, TypeVar
 
 from fastapi import Depends
-from loguru import logger
 from pydantic import EmailStr
-from sqlalchemy import delete, select
+from sqlalchemy import Select, and_, delete, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
+from core.auth.password import get_password_executor
+from core.auth.principal import get_principal_cache
+from core.auth.revocation import get_revocation_list, revoked_user_key, revoked_version_key
+from core.constants.role import UserRole
+from core.database import get_session_factory
+from core.exceptions.confirm import ConfirmError
 from core.exceptions.user import UserAlreadyRegistered, UserNotFound
-from db.dependencies import get_db_session
+from core.settings import jwt_settings, pagination_settings
+from db.cleanup import delete_in_batches
+from db.crud.revoked_token import RevokedTokenCRUD
+from db.dependencies import get_db_session, on_commit
 from db.models.user import User
-from schemas.user import UserRegisterSchema, UserUpdateSchema
+from schemas.user import UserFilterSchema, UserRegisterSchema, UserUpdateSchema
 from services.confirm import ConfirmService
+from services.paginations import get_row_count_cache
+
+T = TypeVar("T", bound=tuple[Any, ...])
+
+IMPORT_STAGING_TABLE = "user_import_staging"
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at is stored as UTC without a time zone.
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
 
 
 class UserCRUD:
@@ -19,6 +41,12 @@ class UserCRUD:
         self.session = session
         self.confirm_service = confirm_service
 
+    def _invalidate_principal(self, user_id: int) -> None:
+        principal_cache = get_principal_cache()
+        principal_cache.invalidate(user_id)
+        # A concurrent request may cache the old row again until this transaction commits.
+        on_commit(self.session, lambda: principal_cache.invalidate(user_id))
+
     async def get_by_email(self, email: EmailStr) -> User:
         result = await self.session.execute(select(User).where(User.email == email))
         user = result.scalars().first()
@@ -34,22 +62,27 @@ class UserCRUD:
         return user
 
     async def registration(self, data: UserRegisterSchema) -> User:
-        # Проверка, существует ли email
-        try:
-            await self.get_by_email(data.email)
-            raise UserAlreadyRegistered()
-        except UserNotFound:
-            pass
+        """
+        Create an unverified user and send the confirmation code.
 
-        user = User(
-            email=data.email,
-            first_name=data.first_name,
-            last_name=data.last_name,
+        The unique email is enforced by the INSERT itself, so concurrent signups
+        for the same address cannot both succeed.
+        """
+        password_hash = await get_password_executor().hash(data.password)
+        stmt = (
+            insert(User)
+            .values(
+                email=data.email,
+                first_name=data.first_name,
+                last_name=data.last_name,
+                password=password_hash,
+            )
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User)
         )
-        await user.set_password(data.password)
-        self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+        user = (await self.session.scalars(stmt)).first()
+        if user is None:
+            raise UserAlreadyRegistered()
 
         # Отправка письма подтверждения
         await self.confirm_service.send_confirm(email=user.email)
@@ -57,18 +90,29 @@ class UserCRUD:
         return user
 
     async def confirm(self, email: EmailStr, code: int) -> bool:
-        user = await self.get_by_email(email)
-        if user.is_verified:
-            return True
-
-        is_confirmed = await self.confirm_service.check_confirm(email=email, code=code)
-        if is_confirmed:
-            user.is_verified = True
-            self.session.add(user)
-            await self.session.commit()
-            await self.session.refresh(user)
-            return True
-        return False
+        """
+        Verify the user's email with ``code``.
+
+        The code is checked first and the user flipped with one UPDATE; the
+        user is only looked up when the code check fails, e.g. for users who
+        are already verified and have no pending code.
+        """
+        try:
+            is_confirmed = await self.confirm_service.check_confirm(email=email, code=code)
+        except ConfirmError:
+            user = await self.get_by_email(email)
+            if user.is_verified:
+                return True
+            raise
+        if not is_confirmed:
+            return False
+
+        stmt = update(User).where(User.email == email).values(is_verified=True).returning(User.id)
+        user_id = (await self.session.execute(stmt)).scalar_one_or_none()
+        if user_id is None:
+            raise UserNotFound()
+        self._invalidate_principal(user_id)
+        return True
 
     async def resend_confirmation(self, email: EmailStr) -> None:
         user = await self.get_by_email(email)
@@ -76,48 +120,263 @@ class UserCRUD:
             return
         await self.confirm_service.send_confirm(email=email)
 
-    async def get_list(self, limit: int = 100, offset: int = 0) -> tuple[list[User], int]:
-        total_stmt = select(func.count()).select_from(User)
-        total_result = await self.session.execute(total_stmt)
-        total = total_result.scalar_one()
+    @staticmethod
+    def _filter(stmt: Select[T], filters: UserFilterSchema | None) -> Select[T]:
+        if filters is None:
+            return stmt
+        if filters.role is not None:
+            stmt = stmt.where(User.role == filters.role)
+        if filters.is_verified is not None:
+            stmt = stmt.where(User.is_verified == filters.is_verified)
+        if filters.created_from is not None:
+            stmt = stmt.where(User.created_at >= _naive_utc(filters.created_from))
+        if filters.created_to is not None:
+            stmt = stmt.where(User.created_at < _naive_utc(filters.created_to))
+        if filters.q:
+            # Backslash is PostgreSQL's default LIKE escape character.
+            pattern = "%" + filters.q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            stmt = stmt.where(
+                or_(
+                    User.email.ilike(pattern),
+                    User.first_name.ilike(pattern),
+                    User.last_name.ilike(pattern),
+                )
+            )
+        return stmt
+
+    @staticmethod
+    def export_statement(filters: UserFilterSchema | None = None) -> Select[Any]:
+        """
+        Plain columns (no ORM objects, no password) of the users matching ``filters``, by id.
+        """
+        stmt = select(
+            User.id,
+            User.email,
+            User.first_name,
+            User.last_name,
+            User.role,
+            User.is_verified,
+            User.created_at,
+            User.updated_at,
+        )
+        return UserCRUD._filter(stmt, filters).order_by(User.id)
+
+    async def get_list(self, limit: int = 100, offset: int = 0, filters: UserFilterSchema | None = None) -> list[User]:
+        stmt = self._filter(select(User), filters).order_by(User.id).limit(limit).offset(offset)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def count(self, filters: UserFilterSchema | None = None) -> tuple[int, bool]:
+        """
+        Total number of users and whether it is a planner estimate, per ``PAGINATION_COUNT_STRATEGY``.
+
+        Filtered totals are always counted exactly through the filter indexes.
+        """
+        filtered = filters is not None and any(value is not None for value in filters.model_dump().values())
+        strategy = "exact" if filtered else pagination_settings.count_strategy
+        if strategy == "estimate":
+            # reltuples is -1 until the table has been vacuumed or analyzed once.
+            estimate = await self.session.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": User.__tablename__},
+            )
+            if estimate is not None and estimate >= 0:
+                return estimate, True
+        elif strategy == "cached":
+            return await get_row_count_cache().get(User.__tablename__, _count_users), False
+
+        result = await self.session.execute(self._filter(select(func.count()).select_from(User), filters))
+        return result.scalar_one(), False
+
+    async def get_page(
+        self,
+        limit: int = 100,
+        after: int | None = None,
+        before: int | None = None,
+        filters: UserFilterSchema | None = None,
+    ) -> tuple[list[User], bool]:
+        """
+        Keyset page ordered by id: rows after ``after`` or, walking backwards, before ``before``.
+
+        Returns the page and whether more rows exist in the direction of travel.
+        The primary key index serves every page without scanning skipped rows.
+        """
+        stmt = self._filter(select(User), filters).limit(limit + 1)
+        if before is not None:
+            stmt = stmt.where(User.id < before).order_by(User.id.desc())
+        else:
+            if after is not None:
+                stmt = stmt.where(User.id > after)
+            stmt = stmt.order_by(User.id)
 
-        stmt = select(User).limit(limit).offset(offset)
         result = await self.session.execute(stmt)
         items = list(result.scalars().all())
+        has_more = len(items) > limit
+        items = items[:limit]
+        if before is not None:
+            items.reverse()
 
-        return items, total
+        return items, has_more
 
     async def update(self, user_id: int, data: UserUpdateSchema) -> User:
-        user = await self.get_by_id(user_id)
-        for key, value in data.model_dump(exclude_unset=True, exclude_none=True).items():
-            setattr(user, key, value)
-        await self.session.commit()
-        await self.session.refresh(user)
+        values = data.model_dump(exclude_unset=True, exclude_none=True)
+        if not values:
+            return await self.get_by_id(user_id)
+
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = (await self.session.scalars(stmt)).first()
+        if user is None:
+            raise UserNotFound()
+        self._invalidate_principal(user_id)
         return user
 
+    async def update_password_hash(self, user: User, password_hash: str) -> None:
+        user.password = password_hash
+
+    async def _deny_access_tokens(self, key: str) -> None:
+        """
+        Put ``key`` on the access-token denylist until the tokens it covers have expired.
+
+        Stateless mode reads no user row, and other processes may hold a cached
+        principal, so the denylist is what carries a revocation to them.
+        """
+        expires_at = datetime.now(UTC) + timedelta(seconds=jwt_settings.access_token_expire)
+        await get_revocation_list().revoke(RevokedTokenCRUD(session=self.session), key, expires_at)
+
+    async def set_role(self, user_id: int, role: UserRole) -> User:
+        """
+        Change the user's role and revoke tokens that carry the old one.
+
+        Other processes may cache the old role until their principal entry expires;
+        the denied token version is what rejects old tokens there.
+        """
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(role=role, token_version=User.token_version + 1)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = (await self.session.scalars(stmt)).first()
+        if user is None:
+            raise UserNotFound()
+        self._invalidate_principal(user_id)
+        await self._deny_access_tokens(revoked_version_key(user_id, user.token_version - 1))
+        return user
+
+    async def revoke_tokens(self, user_id: int) -> None:
+        """
+        Bump the user's token version so previously issued tokens stop validating.
+        """
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(token_version=User.token_version + 1)
+            .returning(User.token_version)
+        )
+        version = (await self.session.execute(stmt)).scalar_one_or_none()
+        if version is None:
+            raise UserNotFound()
+        self._invalidate_principal(user_id)
+        await self._deny_access_tokens(revoked_version_key(user_id, version - 1))
+
     async def delete(self, user_id: int) -> None:
-        user = await self.get_by_id(user_id)
-        if user:
-            await self.session.delete(user)
-            await self.session.commit()
+        """
+        Delete the user and deny their access tokens until the last one expires.
+        """
+        result = await self.session.execute(delete(User).where(User.id == user_id).returning(User.id))
+        if result.scalar_one_or_none() is None:
+            raise UserNotFound()
+        self._invalidate_principal(user_id)
+        await self._deny_access_tokens(revoked_user_key(user_id))
 
-    async def delete_old_unverified_users(self) -> None:
+    async def create_import_staging(self) -> None:
         """
-        Delete users who are unverified and older than 2-days.
+        Create the transaction-local staging table filled by ``copy_import_rows``.
         """
-        threshold = (datetime.now(UTC) - timedelta(days=2)).replace(tzinfo=None)
+        await self.session.execute(
+            text(
+                f"CREATE TEMP TABLE IF NOT EXISTS {IMPORT_STAGING_TABLE} ("
+                "row_number integer NOT NULL, "
+                "email varchar(255) NOT NULL, "
+                "first_name varchar(100), "
+                "last_name varchar(100), "
+                "password varchar(255) NOT NULL"
+                ") ON COMMIT DROP"
+            )
+        )
+        # Left over if an earlier import ran in the same transaction.
+        await self.session.execute(text(f"TRUNCATE {IMPORT_STAGING_TABLE}"))
 
-        stmt = delete(User).where(User.created_at < threshold, User.is_verified.is_(False)).returning(User.id)
+    async def copy_import_rows(self, rows: list[tuple[int, str, str | None, str | None, str]]) -> None:
+        """
+        Load ``(row_number, email, first_name, last_name, password_hash)`` rows with COPY.
+        """
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        asyncpg_connection: Any = raw_connection.driver_connection
+        await asyncpg_connection.copy_records_to_table(
+            IMPORT_STAGING_TABLE,
+            records=rows,
+            columns=["row_number", "email", "first_name", "last_name", "password"],
+        )
 
-        result = await self.session.execute(stmt)
-        deleted_ids = result.scalars().all()
+    async def merge_import(self) -> list[tuple[int, str, bool]]:
+        """
+        Insert staged users as verified ``USER`` accounts, skipping existing emails.
+
+        Returns the rejected rows as ``(row_number, email, duplicate_in_file)``; rows
+        that are not duplicates within the file collided with a registered user.
+        """
+        result = await self.session.execute(
+            text(
+                f"""
+                WITH candidates AS (
+                    SELECT DISTINCT ON (email) row_number, email, first_name, last_name, password
+                    FROM {IMPORT_STAGING_TABLE}
+                    ORDER BY email, row_number
+                ), inserted AS (
+                    INSERT INTO custom_user (
+                        email, first_name, last_name, password, role, is_verified, token_version, created_at, updated_at
+                    )
+                    SELECT email, first_name, last_name, password, :role, true, 0, now(), now()
+                    FROM candidates
+                    ON CONFLICT (email) DO NOTHING
+                    RETURNING email
+                )
+                SELECT staging.row_number, staging.email, candidates.row_number IS NULL AS duplicate
+                FROM {IMPORT_STAGING_TABLE} AS staging
+                LEFT JOIN candidates ON candidates.row_number = staging.row_number
+                LEFT JOIN inserted ON inserted.email = candidates.email
+                WHERE candidates.row_number IS NULL OR inserted.email IS NULL
+                ORDER BY staging.row_number
+                """  # noqa: S608
+            ),
+            {"role": UserRole.USER.value},
+        )
+        return [(row.row_number, row.email, row.duplicate) for row in result]
+
+    async def delete_old_unverified_users(self, batch_size: int = 1000) -> int:
+        """
+        Delete users who are unverified and older than 2-days, in batches committed one by one.
+        """
+        threshold = (datetime.now(UTC) - timedelta(days=2)).replace(tzinfo=None)
+        # Served by ix_custom_user_is_verified_created_at.
+        stale = and_(User.is_verified.is_(False), User.created_at < threshold)
+        return await delete_in_batches(self.session, User.id, stale, batch_size)
 
-        if deleted_ids:
-            logger.info(f"Deleted {len(deleted_ids)} old unverified users: {deleted_ids}")
-        else:
-            logger.info("No old unverified users found.")
 
-        await self.session.commit()
+async def _count_users() -> int:
+    # Runs outside the request, possibly after its session has closed.
+    async with get_session_factory()() as session:
+        result = await session.execute(select(func.count()).select_from(User))
+        return result.scalar_one()
 
 
 def get_user_crud(
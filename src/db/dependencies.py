@@ -1,26 +1,91 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.requests import Request
+from starlette.responses import Response
 
-from core.database import get_session_factory
+from core.database import LAST_WRITE_COOKIE, get_replica_router, get_replica_session_factory, get_session_factory
 
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+# ``session.info`` key of the callbacks registered with ``on_commit``.
+ON_COMMIT_KEY = "on_commit"
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], Any]) -> None:
+    """
+    Run ``callback`` after the next successful ``commit`` of ``session``.
+
+    Callbacks are discarded if the transaction rolls back instead, so side
+    effects such as enqueued tasks never refer to rows that do not exist.
+    """
+    session.info.setdefault(ON_COMMIT_KEY, []).append(callback)
+
+
+async def commit(session: AsyncSession) -> None:
+    """
+    Commit ``session`` and run the callbacks registered with ``on_commit``.
+    """
+    await session.commit()
+    for callback in session.info.pop(ON_COMMIT_KEY, []):
+        callback()
+
+
+async def get_db_session(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
     """
     Create and get database session.
 
+    The request is one unit of work: CRUD methods only flush, and the session
+    is committed once after the endpoint returns, or rolled back if it raised.
+    A connection is checked out of the pool only when the first statement runs,
+    so requests that never touch the database do not hold one.
+
+    Safe requests are served by the read replica when one is configured, unless
+    the client wrote recently or the replica lags too far behind. Other requests
+    mark the client as a recent writer with a cookie on ``response``.
+
     :param request: current request.
+    :param response: response whose headers are merged into the endpoint's.
     :yield: database session.
     """
+    replica_session_factory = get_replica_session_factory()
+    if replica_session_factory is not None:
+        router = get_replica_router()
+        if request.method not in SAFE_METHODS:
+            router.mark_write(response)
+        elif router.use_replica(request.cookies.get(LAST_WRITE_COOKIE)):
+            async with replica_session_factory() as replica_session:
+                yield replica_session
+            return
+
     session_factory = get_session_factory()
     session = session_factory()
 
     try:
         yield session
-        await session.commit()
+        await commit(session)
     except Exception:
+        session.info.pop(ON_COMMIT_KEY, None)
         await session.rollback()
         raise
     finally:
         await session.close()
+
+
+def get_read_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Session factory for reads that outlive the request session, e.g. streamed responses.
+
+    Prefers the read replica under the same rules as ``get_db_session``.
+
+    :param request: current request.
+    """
+    replica_session_factory = get_replica_session_factory()
+    if (
+        replica_session_factory is not None
+        and request.method in SAFE_METHODS
+        and get_replica_router().use_replica(request.cookies.get(LAST_WRITE_COOKIE))
+    ):
+        return replica_session_factory
+    return get_session_factory()
@@ -4,7 +4,9 @@ from logging.config import fileConfig
 from alembic import context
 from sqlalchemy.ext.asyncio.engine import create_async_engine
 from sqlalchemy.future import Connection
+from sqlalchemy.pool import NullPool
 
+from core.database import pooler_connect_args
 from core.settings import get_settings
 from db.meta import meta
 from db.models import load_all_models
@@ -76,7 +78,11 @@ async def run_migrations_online() -> None:
     and associate a connection with the context.
     """
     settings = get_settings()
-    connectable = create_async_engine(settings.postgres_url)
+    connectable = create_async_engine(
+        settings.postgres_url,
+        poolclass=NullPool,
+        connect_args=pooler_connect_args(settings),
+    )
 
     async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
@@ -0,0 +1,27 @@
+"""Add custom_user.token_version
+
+Revision ID: 6bd1cb58f742
+Revises: 57ffde3babd2
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6bd1cb58f742"
+down_revision = "57ffde3babd2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "custom_user",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("custom_user", "token_version")
@@ -0,0 +1,31 @@
+"""Add revoked_token table
+
+Revision ID: 24d7afa4eabf
+Revises: d897498841ef
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "24d7afa4eabf"
+down_revision = "d897498841ef"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_token",
+        sa.Column("jti", sa.String(length=32), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("jti", name=op.f("pk_revoked_token")),
+    )
+    op.create_index(op.f("ix_revoked_token_expires_at"), "revoked_token", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_revoked_token_expires_at"), table_name="revoked_token")
+    op.drop_table("revoked_token")
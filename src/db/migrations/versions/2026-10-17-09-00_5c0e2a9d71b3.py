@@ -0,0 +1,52 @@
+"""Add filter and search indexes to custom_user
+
+Revision ID: 5c0e2a9d71b3
+Revises: 24d7afa4eabf
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c0e2a9d71b3"
+down_revision = "24d7afa4eabf"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Build without blocking writes to a large user table.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_custom_user_created_at",
+            "custom_user",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_custom_user_is_verified_created_at",
+            "custom_user",
+            ["is_verified", "created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_custom_user_search_trgm",
+            "custom_user",
+            ["email", "first_name", "last_name"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops", "first_name": "gin_trgm_ops", "last_name": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_custom_user_search_trgm", table_name="custom_user", postgresql_concurrently=True)
+        op.drop_index("ix_custom_user_is_verified_created_at", table_name="custom_user", postgresql_concurrently=True)
+        op.drop_index("ix_custom_user_created_at", table_name="custom_user", postgresql_concurrently=True)
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
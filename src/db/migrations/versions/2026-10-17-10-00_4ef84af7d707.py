@@ -0,0 +1,50 @@
+"""Slim confirm_code indexes, make email unique and tune fillfactor
+
+Revision ID: 4ef84af7d707
+Revises: 5c0e2a9d71b3
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4ef84af7d707"
+down_revision = "5c0e2a9d71b3"
+branch_labels = None
+depends_on = None
+
+# Indexes on counters and lock times: no query filters on them, and every attempt updated them.
+UNUSED_INDEXES = ["code", "try_count", "resend_count", "expire_time", "unlock_time", "resend_unlock_time"]
+
+
+def upgrade() -> None:
+    # The table only holds in-flight codes, so it is small enough to lock briefly.
+    # Keep the newest row of each email before enforcing uniqueness.
+    op.execute(
+        "DELETE FROM confirm_code AS older USING confirm_code AS newer "
+        "WHERE older.email = newer.email AND older.id < newer.id"
+    )
+    for column in UNUSED_INDEXES:
+        op.drop_index(op.f(f"ix_confirm_code_{column}"), table_name="confirm_code")
+    op.drop_index(op.f("ix_confirm_code_email"), table_name="confirm_code")
+    op.create_index(op.f("ix_confirm_code_email"), "confirm_code", ["email"], unique=True)
+    op.create_index(
+        "ix_confirm_code_stale_after",
+        "confirm_code",
+        [sa.text("GREATEST(expire_time, unlock_time, resend_unlock_time)")],
+        unique=False,
+        postgresql_where=sa.text("expire_time IS NOT NULL"),
+    )
+    # Applies to pages written from now on; the rows turn over within minutes.
+    op.execute("ALTER TABLE confirm_code SET (fillfactor = 70)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE confirm_code RESET (fillfactor)")
+    op.drop_index("ix_confirm_code_stale_after", table_name="confirm_code")
+    op.drop_index(op.f("ix_confirm_code_email"), table_name="confirm_code")
+    op.create_index(op.f("ix_confirm_code_email"), "confirm_code", ["email"], unique=False)
+    for column in UNUSED_INDEXES:
+        op.create_index(op.f(f"ix_confirm_code_{column}"), "confirm_code", [column], unique=False)
@@ -6,6 +6,9 @@ from sqlalchemy.orm import Mapped, declarative_mixin, mapped_column
 
 @declarative_mixin
 class BaseMixin:
+    # Fetch server-generated timestamps with RETURNING on flush instead of a refresh query.
+    __mapper_args__ = {"eager_defaults": True}
+
     created_at: Mapped[datetime] = mapped_column(
         default=func.now(), nullable=False, comment="Creation timestamp of the table"
     )
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import AbstractBase
+
+
+class RefreshToken(AbstractBase):
+    """Issued refresh token; rotated on every use, revoked per family on reuse."""
+
+    __tablename__ = "refresh_token"
+
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    family_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("custom_user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    used: Mapped[bool] = mapped_column(nullable=False, default=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken jti={self.jti}, family_id={self.family_id}, used={self.used}>"
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import AbstractBase
+
+
+class RevokedToken(AbstractBase):
+    """Access token revoked before its expiry (logout or forced revocation)."""
+
+    __tablename__ = "revoked_token"
+
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<RevokedToken jti={self.jti}>"
@@ -1,9 +1,9 @@
-import bcrypt
 from pydantic import EmailStr
-from sqlalchemy import BigInteger, Enum
+from sqlalchemy import BigInteger, Enum, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql.sqltypes import String
 
+from core.auth.password import get_password_executor
 from core.constants.role import UserRole
 from db.base import AbstractBase
 from db.models.base import BaseMixin
@@ -11,6 +11,21 @@ from db.models.base import BaseMixin
 
 class User(AbstractBase, BaseMixin):
     __tablename__ = "custom_user"
+    __table_args__ = (
+        Index("ix_custom_user_created_at", "created_at"),
+        # Serves is_verified filters with or without a created_at range, and the
+        # cleanup task's batches of unverified users older than a cutoff.
+        Index("ix_custom_user_is_verified_created_at", "is_verified", "created_at"),
+        # Trigram index for ILIKE '%q%' searches; needs the pg_trgm extension.
+        Index(
+            "ix_custom_user_search_trgm",
+            "email",
+            "first_name",
+            "last_name",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops", "first_name": "gin_trgm_ops", "last_name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     email: Mapped[EmailStr] = mapped_column(String(255), unique=True, nullable=False, index=True)
@@ -24,6 +39,7 @@ class User(AbstractBase, BaseMixin):
         default=UserRole.USER,
     )
     is_verified: Mapped[bool] = mapped_column(nullable=False, default=False)
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     async def set_password(self, password: str) -> None:
         """
@@ -31,16 +47,13 @@ class User(AbstractBase, BaseMixin):
         """
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters long.")
-        self.password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        self.password = await get_password_executor().hash(password)
 
     async def check_password(self, password: str) -> bool:
         """
         Verify if the provided password matches the stored hashed password.
         """
-        try:
-            return bcrypt.checkpw(password.encode("utf-8"), self.password.encode("utf-8"))
-        except (ValueError, AttributeError):
-            return False
+        return await get_password_executor().verify(password, self.password)
 
     def __repr__(self) -> str:
         return f"<User id={self.id}, email={self.email}, role={self.role}>"
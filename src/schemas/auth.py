@@ -1,7 +1,8 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
 from pydantic import EmailStr, Field
 
+from core.constants.role import UserRole
 from schemas.base import BaseSchema
 
 
@@ -24,6 +25,26 @@ class TokenPayload(BaseSchema):
         str,
         Field(description="JWT ID: unique identifier for the token"),
     ]
+    typ: Annotated[
+        Literal["access", "refresh"] | None,
+        Field(description="Token type; only access tokens authorize requests"),
+    ] = None
+    role: Annotated[
+        UserRole | None,
+        Field(description="User role (stateless mode only)"),
+    ] = None
+    is_verified: Annotated[
+        bool | None,
+        Field(description="User email verification status (stateless mode only)"),
+    ] = None
+    ver: Annotated[
+        int | None,
+        Field(description="User token version; tokens with an older version are revoked"),
+    ] = None
+    fid: Annotated[
+        str | None,
+        Field(description="Refresh token family (login session) the token belongs to"),
+    ] = None
 
 
 class TokenSchema(BaseSchema):
@@ -38,6 +59,7 @@ class RefreshRequestSchema(BaseSchema):
 
 class RefreshTokenSchema(BaseSchema):
     access_token: Annotated[str, Field(description="Newly issued access token")]
+    refresh_token: Annotated[str, Field(description="Newly issued refresh token; the one sent is now spent")]
 
 
 class AuthSchema(BaseSchema):
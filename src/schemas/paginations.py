@@ -9,6 +9,8 @@ class PaginationLinks(BaseModel):
     next: str | None = None
     previous: str | None = None
     count: int | None = None
+    # True when count is the planner's estimate rather than an exact total.
+    count_estimated: bool = False
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
@@ -2,6 +2,7 @@ from datetime import datetime
 
 from pydantic import EmailStr, Field, model_validator
 
+from core.constants.role import UserRole
 from schemas.base import BaseSchema
 
 
@@ -32,3 +33,27 @@ class UserReadSchema(BaseSchema):
 class UserUpdateSchema(BaseSchema):
     first_name: str | None = Field(None, description="User's first name")
     last_name: str | None = Field(None, description="User's last name")
+
+
+class UserRoleUpdateSchema(BaseSchema):
+    role: UserRole = Field(..., description="New role; tokens issued with the old one stop validating")
+
+
+class UserFilterSchema(BaseSchema):
+    role: UserRole | None = None
+    is_verified: bool | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    q: str | None = None
+
+
+class UserImportErrorSchema(BaseSchema):
+    row: int = Field(..., description="1-based data row number in the uploaded file")
+    email: str | None = Field(None, description="Email of the rejected row, if it could be read")
+    errors: list[str] = Field(..., description="Reasons the row was rejected")
+
+
+class UserImportReportSchema(BaseSchema):
+    received: int = Field(..., description="Number of data rows in the uploaded file")
+    imported: int = Field(..., description="Number of users created")
+    errors: list[UserImportErrorSchema] = Field(..., description="Rejected rows")
@@ -6,18 +6,24 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from loguru import logger
 
 from core.auth.jwt_auth import JWTHandler
+from core.auth.keys import get_key_ring
+from core.auth.principal import Principal, get_principal_cache
+from core.auth.revocation import get_revocation_list, revoked_user_key, revoked_version_key
 from core.constants.role import UserRole
 from core.exceptions.role import PermissionDeniedError, UnauthorizedError
 from core.exceptions.user import UserNotFound
 from core.settings import jwt_settings
+from db.crud.revoked_token import RevokedTokenCRUD, get_revoked_token_crud
 from db.crud.user import UserCRUD, get_user_crud
 from schemas.auth import TokenPayload
 
 security = HTTPBearer()
 jwt_handler = JWTHandler(
-    secret_key=jwt_settings.secret_key,
-    algorithm=jwt_settings.algorithm,
+    key_ring=get_key_ring(),
+    cache_size=jwt_settings.token_cache_size,
 )
+principal_cache = get_principal_cache()
+revocation_list = get_revocation_list()
 
 
 def get_current_user(
@@ -29,10 +35,12 @@ def get_current_user(
     or use the default dependency (any authenticated user):
       Depends(get_current_user())
     """
+    allowed = {r if isinstance(r, UserRole) else UserRole(r) for r in roles} if roles else None
 
     async def _dependency(
         credentials: Annotated[HTTPAuthorizationCredentials, Security(security)],
         user_crud: UserCRUD = Depends(get_user_crud),
+        revoked_token_crud: RevokedTokenCRUD = Depends(get_revoked_token_crud),
     ) -> TokenPayload:
         # 1) check scheme
         if credentials.scheme.lower() != "bearer":
@@ -50,20 +58,46 @@ def get_current_user(
             logger.error("Invalid token: sub must be int or str")
             raise UnauthorizedError()
 
-        # 4) get user from DB
-        user_id = token_payload.sub_id
-        try:
-            user = await user_crud.get_by_id(user_id)
-        except UserNotFound:
-            logger.error(f"User not found for sub={user_id}")
-            raise UnauthorizedError() from None
-
-        # 5) check role(s) if provided
-        if roles:
-            allowed = {r if isinstance(r, UserRole) else UserRole(r) for r in roles}
-            user_role = getattr(user, "role", None)
-            if user_role is None or user_role not in allowed:
+        # Refresh tokens share the signing key and claims; they only work at /auth/refresh.
+        if token_payload.typ != "access":
+            logger.error(f"Token of type {token_payload.typ} used as access token")
+            raise UnauthorizedError()
+
+        # 4) denylist of tokens, deleted users and bumped token versions: the Bloom
+        #    filter rules out almost every token without I/O
+        keys = [token_payload.jti, revoked_user_key(token_payload.sub_id)]
+        if token_payload.ver is not None:
+            keys.append(revoked_version_key(token_payload.sub_id, token_payload.ver))
+        for key in keys:
+            if revocation_list.might_be_revoked(key) and await revoked_token_crud.is_revoked(key):
+                logger.error(f"Revoked token jti={token_payload.jti} ({key})")
+                raise UnauthorizedError()
+
+        # 5) stateless mode: authorize from the verified claims, no database round trip
+        if jwt_settings.stateless and token_payload.role is not None:
+            if allowed and token_payload.role not in allowed:
                 raise PermissionDeniedError()
+            return token_payload
+
+        # 6) get principal from cache or DB
+        user_id = token_payload.sub_id
+        principal = principal_cache.get(user_id)
+        if principal is None:
+            try:
+                user = await user_crud.get_by_id(user_id)
+            except UserNotFound:
+                logger.error(f"User not found for sub={user_id}")
+                raise UnauthorizedError() from None
+            principal = Principal.from_user(user)
+            principal_cache.set(principal)
+
+        if token_payload.ver is not None and token_payload.ver != principal.token_version:
+            logger.error(f"Revoked token version for sub={user_id}")
+            raise UnauthorizedError()
+
+        # 7) check role(s) if provided
+        if allowed and principal.role not in allowed:
+            raise PermissionDeniedError()
 
         return token_payload
 
@@ -10,6 +10,7 @@ from core.celery.tasks.confirm import send_confirm_task
 from core.exceptions.confirm import ConfirmError
 from core.settings import settings
 from db.crud.confirm import ConfirmCodeCRUD
+from db.dependencies import on_commit
 
 
 class ConfirmService:
@@ -29,8 +30,8 @@ class ConfirmService:
         try:
             # prepare_and_save_code may raise ConfirmError -> let it bubble up
             await self.confirm_crud.prepare_and_save_code(email, code)
-            # send async with Celery
-            send_confirm_task.delay(email, code)
+            # send async with Celery once the code is committed
+            on_commit(self.confirm_crud.session, lambda: send_confirm_task.delay(email, code))
         except ConfirmError:
             # Re-raise so FastAPI (and your APIException handler) returns the ConfirmError response.
             raise
@@ -1,103 +1,144 @@
-import hashlib
+import secrets
 from datetime import UTC, datetime, timedelta
 from typing import Annotated, Any
 
 import jwt
 from fastapi import Depends
-from passlib.context import CryptContext
 
+from core.auth.keys import KeyRing, get_key_ring
+from core.auth.password import get_password_executor
+from core.auth.principal import Principal
 from core.exceptions.auth import (
     InvalidCredentialsError,
     InvalidRefreshTokenError,
 )
 from core.exceptions.user import UserNotFound
 from core.settings import jwt_settings
+from db.crud.refresh_token import RefreshTokenCRUD, get_refresh_token_crud
 from db.crud.user import UserCRUD, get_user_crud
+from db.models.user import User
 from schemas.auth import RefreshTokenSchema, TokenPayload, TokenSchema
 
 
 class JWTAuthentication:
     def __init__(
         self,
-        algorithm: str = "HS256",
-        access_key: str | None = None,  # secret for HS256 or private key for RS256
-        refresh_key: str | None = None,  # secret for HS256 or private key for RS256
+        key_ring: KeyRing,  # signs with the active key, verifies with any known key
         access_token_expire_seconds: int = 1800,  # 30 min
         refresh_token_expire_seconds: int = 604800,  # 7 days
+        stateless: bool = False,  # embed role/verification claims in access tokens
     ):
-        self.algorithm = algorithm
-        self.access_key = access_key
-        self.refresh_key = refresh_key
+        self.key_ring = key_ring
 
         self.access_token_expire = timedelta(seconds=access_token_expire_seconds)
         self.refresh_token_expire = timedelta(seconds=refresh_token_expire_seconds)
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.stateless = stateless
 
     @staticmethod
-    async def _build_payload(user_id: int, expires_delta: timedelta) -> dict[str, Any]:
+    async def _build_payload(
+        user_id: int, expires_delta: timedelta, claims: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
         now = datetime.now(UTC)
         exp = now + expires_delta
         iat = int(now.timestamp())
-        raw = f"{user_id}-{iat}".encode()
-        jti = hashlib.sha256(raw).hexdigest()
+        jti = secrets.token_hex(16)
 
         return {
             "sub_id": user_id,
             "iat": iat,
             "exp": int(exp.timestamp()),
             "jti": jti,
+            **(claims or {}),
         }
 
-    async def _create_access_token(self, user_id: int) -> str:
-        payload = await self._build_payload(user_id, self.access_token_expire)
-        return jwt.encode(payload, self.access_key, algorithm=self.algorithm)
-
-    async def _create_refresh_token(self, user_id: int) -> str:
-        payload = await self._build_payload(user_id, self.refresh_token_expire)
-        return jwt.encode(payload, self.refresh_key, algorithm=self.algorithm)
+    async def _create_access_token(self, user: User | Principal, family_id: str) -> str:
+        claims: dict[str, Any] = {"typ": "access", "ver": user.token_version, "fid": family_id}
+        if self.stateless:
+            claims.update(role=user.role.value, is_verified=user.is_verified)
+        payload = await self._build_payload(user.id, self.access_token_expire, claims)
+        return self.key_ring.encode(payload)
+
+    async def _create_refresh_token(
+        self, user: User | Principal, family_id: str, refresh_token_crud: RefreshTokenCRUD
+    ) -> str:
+        payload = await self._build_payload(
+            user.id, self.refresh_token_expire, {"typ": "refresh", "ver": user.token_version}
+        )
+        await refresh_token_crud.create(
+            jti=payload["jti"],
+            family_id=family_id,
+            user_id=user.id,
+            expires_at=datetime.fromtimestamp(payload["exp"], UTC),
+        )
+        return self.key_ring.encode(payload)
 
     async def authenticate(
-        self, credentials: dict, user_crud: Annotated[UserCRUD, Depends(get_user_crud)]
+        self,
+        credentials: dict,
+        user_crud: Annotated[UserCRUD, Depends(get_user_crud)],
+        refresh_token_crud: Annotated[RefreshTokenCRUD, Depends(get_refresh_token_crud)],
     ) -> TokenSchema:
         try:
             user = await user_crud.get_by_email(credentials["email"])
         except UserNotFound:
             raise InvalidCredentialsError from None
-        if not user or not await self._verify_password(credentials["password"], user.password):
+        is_valid, new_password_hash = await self._verify_password(credentials["password"], user.password)
+        if not is_valid:
             raise InvalidCredentialsError
         if not user.is_verified:
             raise InvalidCredentialsError
+        if new_password_hash is not None:
+            # Stored hash uses an outdated scheme or cost; upgrade it transparently.
+            await user_crud.update_password_hash(user, new_password_hash)
 
+        family_id = secrets.token_hex(16)
         return TokenSchema(
-            access_token=await self._create_access_token(user.id),
-            refresh_token=await self._create_refresh_token(user.id),
+            access_token=await self._create_access_token(user, family_id),
+            refresh_token=await self._create_refresh_token(user, family_id, refresh_token_crud),
             token_type="bearer",  # noqa: S106
         )
 
     async def refresh_token(
-        self, refresh_token: str, user_crud: Annotated[UserCRUD, Depends(get_user_crud)]
+        self,
+        refresh_token: str,
+        refresh_token_crud: Annotated[RefreshTokenCRUD, Depends(get_refresh_token_crud)],
     ) -> RefreshTokenSchema:
-        try:
-            verify_key = self.refresh_key
-            payload = jwt.decode(refresh_token, verify_key, algorithms=[self.algorithm])
-            token_data = TokenPayload.model_validate(payload)
-
-            user = await user_crud.get_by_id(token_data.sub_id)
-            if not user:
-                raise InvalidRefreshTokenError
+        """
+        Rotate a refresh token: spend it and issue a new access/refresh pair.
 
-            return RefreshTokenSchema(access_token=await self._create_access_token(user.id))
+        Presenting a token that was already spent means it leaked, so its whole
+        family is revoked and every token descended from the same login dies.
+        """
+        try:
+            payload = self.key_ring.decode(refresh_token)
         except jwt.PyJWTError as err:
             raise InvalidRefreshTokenError from err
+        token_data = TokenPayload.model_validate(payload)
+        # An access token is never in the refresh_token table; it must not touch a family either.
+        if token_data.typ != "refresh":
+            raise InvalidRefreshTokenError
+
+        row = await refresh_token_crud.use(token_data.jti)
+        if row is None:
+            await refresh_token_crud.revoke_family(token_data.jti)
+            raise InvalidRefreshTokenError
+
+        principal = Principal(id=row.id, role=row.role, is_verified=row.is_verified, token_version=row.token_version)
+        if token_data.ver is not None and token_data.ver != principal.token_version:
+            raise InvalidRefreshTokenError
+
+        return RefreshTokenSchema(
+            access_token=await self._create_access_token(principal, row.family_id),
+            refresh_token=await self._create_refresh_token(principal, row.family_id, refresh_token_crud),
+        )
 
-    async def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def _verify_password(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await get_password_executor().verify_and_update(plain_password, hashed_password)
 
 
 auth_strategy = JWTAuthentication(
-    algorithm=jwt_settings.algorithm,
-    access_key=jwt_settings.secret_key,
-    refresh_key=jwt_settings.secret_key,
+    key_ring=get_key_ring(),
     access_token_expire_seconds=jwt_settings.access_token_expire,
     refresh_token_expire_seconds=jwt_settings.ref_token_expire,
+    stateless=jwt_settings.stateless,
 )
@@ -1,23 +1,133 @@
-from typing import Generic, TypeVar
+import asyncio
+import base64
+import time
+from collections.abc import Awaitable, Callable
+from functools import cache
+from typing import Any, Generic, Literal, TypeVar
+from urllib.parse import urlencode
+
+from loguru import logger
+
+from core.exceptions.pagination import InvalidCursorError
+from core.settings import pagination_settings
 
 T = TypeVar("T")
 
+CursorDirection = Literal["next", "prev"]
+
+_DIRECTION_PREFIXES: dict[CursorDirection, str] = {"next": "n", "prev": "p"}
+
+
+def _extra_query(params: dict[str, Any] | None) -> str:
+    return f"&{urlencode(params)}" if params else ""
+
 
 class PaginationHelper(Generic[T]):
-    def __init__(self, limit: int, offset: int, total: int):
+    def __init__(self, limit: int, offset: int = 0, total: int = 0):
         self.limit = limit
         self.offset = offset
         self.total = total
 
-    def get_pagination_links(self, base_path: str = "/api/v1/") -> tuple[str | None, str | None]:
+    def get_pagination_links(
+        self, base_path: str = "/api/v1/", params: dict[str, Any] | None = None
+    ) -> tuple[str | None, str | None]:
         next_link = None
         prev_link = None
+        extra = _extra_query(params)
 
         if self.offset + self.limit < self.total:
-            next_link = f"{base_path}?offset={self.offset + self.limit}&limit={self.limit}"
+            next_link = f"{base_path}?offset={self.offset + self.limit}&limit={self.limit}{extra}"
 
         if self.offset > 0:
             prev_offset = max(0, self.offset - self.limit)
-            prev_link = f"{base_path}?offset={prev_offset}&limit={self.limit}"
+            prev_link = f"{base_path}?offset={prev_offset}&limit={self.limit}{extra}"
 
         return next_link, prev_link
+
+    @staticmethod
+    def encode_cursor(key: int, direction: CursorDirection) -> str:
+        raw = f"{_DIRECTION_PREFIXES[direction]}:{key}".encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[int, CursorDirection]:
+        """
+        Return the key and direction of an opaque cursor.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            prefix, key = raw.split(":", 1)
+            direction = next(name for name, value in _DIRECTION_PREFIXES.items() if value == prefix)
+            return int(key), direction
+        except (ValueError, UnicodeDecodeError, StopIteration) as e:
+            raise InvalidCursorError() from e
+
+    def get_cursor_links(
+        self,
+        first_key: int | None,
+        last_key: int | None,
+        has_more: bool,
+        direction: CursorDirection | None,
+        base_path: str = "/api/v1/",
+        params: dict[str, Any] | None = None,
+    ) -> tuple[str | None, str | None]:
+        """
+        Build links for a keyset page ordered by key.
+
+        ``has_more`` tells whether rows exist beyond the page in the direction
+        it was fetched; ``direction`` is None for the first page. ``params`` are
+        carried over to the links, e.g. the active filters.
+        """
+        next_link = None
+        prev_link = None
+        extra = _extra_query(params)
+        if first_key is None or last_key is None:
+            return next_link, prev_link
+
+        if has_more or direction == "prev":
+            next_link = f"{base_path}?cursor={self.encode_cursor(last_key, 'next')}&limit={self.limit}{extra}"
+
+        if direction == "next" or (direction == "prev" and has_more):
+            prev_link = f"{base_path}?cursor={self.encode_cursor(first_key, 'prev')}&limit={self.limit}{extra}"
+
+        return next_link, prev_link
+
+
+class RowCountCache:
+    def __init__(self, ttl: float) -> None:
+        """
+        Per-process cache of exact row counts keyed by name.
+
+        A stale entry is still served while a background task reloads it, so only
+        the first request for a key ever waits for the count.
+        """
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, int]] = {}
+        self._refreshing: dict[str, asyncio.Task[None]] = {}
+
+    async def get(self, key: str, load: Callable[[], Awaitable[int]]) -> int:
+        entry = self._entries.get(key)
+        if entry is None:
+            value = await load()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+        if entry[0] <= time.monotonic() and key not in self._refreshing:
+            self._refreshing[key] = asyncio.create_task(self._refresh(key, load))
+        return entry[1]
+
+    async def _refresh(self, key: str, load: Callable[[], Awaitable[int]]) -> None:
+        try:
+            self._entries[key] = (time.monotonic() + self.ttl, await load())
+        except Exception as e:
+            logger.error(f"Row count refresh failed for {key}: {e}")
+        finally:
+            del self._refreshing[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@cache
+def get_row_count_cache() -> RowCountCache:
+    return RowCountCache(ttl=pagination_settings.count_cache_ttl)
@@ -0,0 +1,159 @@
+import asyncio
+import codecs
+import csv
+import io
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+import orjson
+from fastapi import Depends
+from pydantic import ValidationError
+
+from core.auth.password import PasswordExecutor, get_password_executor
+from db.crud.user import UserCRUD, get_user_crud
+from schemas.user import UserImportErrorSchema, UserImportReportSchema, UserRegisterSchema
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# Rows validated, hashed and copied to the staging table per round trip.
+BATCH_SIZE = 5000
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[list[str]]:
+    record = ""
+    async for line in lines:
+        record += line
+        # An odd number of quotes means a quoted field continues on the next line.
+        if record.count('"') % 2:
+            continue
+        if record.strip():
+            yield next(csv.reader(io.StringIO(record, newline="")))
+        record = ""
+    if record.strip():
+        yield next(csv.reader(io.StringIO(record, newline="")))
+
+
+async def _iter_rows(chunks: AsyncIterator[bytes], import_format: ImportFormat) -> AsyncIterator[dict[str, Any] | str]:
+    """
+    Yield each data row as a dict, or as an error message if it cannot be parsed.
+    """
+    lines = _iter_lines(chunks)
+    if import_format == "ndjson":
+        async for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield "Invalid JSON"
+                continue
+            yield row if isinstance(row, dict) else "Row must be a JSON object"
+        return
+
+    header: list[str] | None = None
+    async for record in _iter_csv_records(lines):
+        if header is None:
+            header = [name.strip() for name in record]
+            continue
+        if len(record) != len(header):
+            yield f"Expected {len(header)} columns, got {len(record)}"
+            continue
+        yield {name: value or None for name, value in zip(header, record, strict=True)}
+
+
+def _validate(row: dict[str, Any]) -> UserRegisterSchema:
+    return UserRegisterSchema.model_validate(
+        {**row, "password_confirm": row.get("password_confirm") or row.get("password")}
+    )
+
+
+def _error_messages(error: ValidationError) -> list[str]:
+    return [f"{'.'.join(map(str, detail['loc'])) or 'row'}: {detail['msg']}" for detail in error.errors()]
+
+
+class UserImportService:
+    def __init__(
+        self,
+        user_crud: UserCRUD = Depends(get_user_crud),
+        password_executor: PasswordExecutor = Depends(get_password_executor),
+    ):
+        self.user_crud = user_crud
+        self.password_executor = password_executor
+
+    async def import_users(self, chunks: AsyncIterator[bytes], import_format: ImportFormat) -> UserImportReportSchema:
+        """
+        Create verified users from a streamed CSV (with a header row) or NDJSON upload.
+
+        Rows are validated with ``UserRegisterSchema``; valid ones are hashed in
+        batches across the password pool, copied into a staging table and merged
+        into ``custom_user`` in one statement. Nothing is committed by this method.
+        """
+        errors: list[UserImportErrorSchema] = []
+        batch: list[tuple[int, UserRegisterSchema]] = []
+        received = 0
+        staged = 0
+        # The previous batch is hashed in the pool while the next one is parsed and validated.
+        staging: asyncio.Task[int] | None = None
+
+        await self.user_crud.create_import_staging()
+        try:
+            async for row in _iter_rows(chunks, import_format):
+                received += 1
+                if isinstance(row, str):
+                    errors.append(UserImportErrorSchema(row=received, email=None, errors=[row]))
+                    continue
+                try:
+                    batch.append((received, _validate(row)))
+                except ValidationError as e:
+                    email = row.get("email")
+                    errors.append(
+                        UserImportErrorSchema(
+                            row=received,
+                            email=email if isinstance(email, str) else None,
+                            errors=_error_messages(e),
+                        )
+                    )
+                    continue
+                if len(batch) >= BATCH_SIZE:
+                    if staging is not None:
+                        staged += await staging
+                    staging = asyncio.create_task(self._stage(batch))
+                    batch = []
+            if staging is not None:
+                staged += await staging
+            if batch:
+                staged += await self._stage(batch)
+        finally:
+            if staging is not None and not staging.done():
+                staging.cancel()
+
+        rejected = await self.user_crud.merge_import()
+        for row_number, email, duplicate in rejected:
+            reason = "Duplicate email in file" if duplicate else "User with this email already exists"
+            errors.append(UserImportErrorSchema(row=row_number, email=email, errors=[reason]))
+        errors.sort(key=lambda error: error.row)
+
+        return UserImportReportSchema(received=received, imported=staged - len(rejected), errors=errors)
+
+    async def _stage(self, batch: list[tuple[int, UserRegisterSchema]]) -> int:
+        hashes = await self.password_executor.hash_many([user.password for _, user in batch])
+        await self.user_crud.copy_import_rows(
+            [
+                (row_number, user.email, user.first_name, user.last_name, password_hash)
+                for (row_number, user), password_hash in zip(batch, hashes, strict=True)
+            ]
+        )
+        return len(batch)
@@ -1,9 +1,12 @@
-from collections.abc import AsyncGenerator
+import json
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator
 from typing import Any
 
 import pytest
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Select, event, text, update
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -12,10 +15,13 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app import create_app
+from core.auth.principal import get_principal_cache
+from core.constants.role import UserRole
 from core.settings import get_settings
-from db.dependencies import get_db_session
+from db.dependencies import commit, get_db_session, get_read_session_factory
 from db.meta import meta
 from db.models import load_all_models
+from db.models.user import User
 
 
 @pytest.fixture(scope="session")
@@ -31,6 +37,7 @@ async def _engine() -> AsyncGenerator[AsyncEngine, None]:
 
     engine = create_async_engine(str(settings.postgres_url))
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(meta.create_all)
 
     try:
@@ -79,7 +86,17 @@ async def fastapi_app(
     :return: fastapi app with mocked dependencies.
     """
     application = create_app()
-    application.dependency_overrides[get_db_session] = lambda: dbsession
+
+    async def _request_session() -> AsyncGenerator[AsyncSession, None]:
+        # Commits only release the savepoint, so the test transaction is still rolled back.
+        yield dbsession
+        await commit(dbsession)
+
+    application.dependency_overrides[get_db_session] = _request_session
+    # Sessions opened outside the request (streamed exports) join the test transaction too.
+    application.dependency_overrides[get_read_session_factory] = lambda: async_sessionmaker(
+        dbsession.bind, expire_on_commit=False
+    )
     return application  # noqa: WPS331
 
 
@@ -113,11 +130,53 @@ async def client(
         yield client
 
 
+@pytest.fixture
+def explain(dbsession: AsyncSession) -> Callable[[Select[Any]], Awaitable[str]]:
+    """
+    Plan statements inside the test transaction.
+
+    :param dbsession: current session.
+    :return: coroutine function giving the JSON plan of a statement, with its parameters inlined.
+    """
+
+    async def _explain(stmt: Select[Any]) -> str:
+        sql = stmt.compile(dialect=postgresql.asyncpg.dialect(), compile_kwargs={"literal_binds": True})
+        result = await dbsession.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+        return json.dumps(result.scalar_one())
+
+    return _explain
+
+
+@pytest.fixture
+def query_counter(_engine: AsyncEngine) -> Iterator[list[str]]:
+    """
+    Record every SQL statement sent to the database while the test runs.
+
+    :param _engine: Current engine.
+    :yield: list of executed statements, filled in as they run.
+    """
+    statements: list[str] = []
+
+    def _before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+
+
 @pytest.fixture(autouse=True)
 def mock_celery_tasks(monkeypatch):
     monkeypatch.setattr("core.celery.tasks.confirm.send_confirm_task.delay", lambda *a, **kw: None)
 
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache() -> None:
+    get_principal_cache().clear()
+
+
 @pytest.fixture
 async def fake_jwt_token(client: AsyncClient) -> str:
     """
@@ -151,3 +210,39 @@ async def fake_jwt_token(client: AsyncClient) -> str:
     )
     data = response.json()
     return data["access_token"]
+
+
+@pytest.fixture
+async def admin_jwt_token(client: AsyncClient, dbsession: AsyncSession) -> str:
+    """
+    A fixture that provides a JWT token of a verified administrator.
+    """
+    email = "admin@mail.com"
+    password = "secret123"  # noqa:S105
+    response = await client.post(
+        "/api/v1/auth/signup",
+        json={
+            "email": email,
+            "first_name": "string",
+            "last_name": "string",
+            "password": password,
+            "password_confirm": password,
+        },
+    )
+    await client.post(
+        "/api/v1/auth/verify",
+        json={
+            "email": email,
+            "code": "1111",
+        },
+    )
+    await dbsession.execute(update(User).where(User.id == response.json()["id"]).values(role=UserRole.ADMIN))
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={
+            "email": email,
+            "password": password,
+        },
+    )
+    data = response.json()
+    return data["access_token"]
@@ -1,5 +1,24 @@
+import asyncio
+
+import jwt
 import pytest
 from httpx import AsyncClient
+from pytest import MonkeyPatch
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.auth.revocation import RevocationList, revoked_version_key
+from core.constants.role import UserRole
+from core.exceptions.user import UserAlreadyRegistered
+from core.settings import jwt_settings
+from db.crud.confirm import ConfirmCodeCRUD
+from db.crud.user import UserCRUD
+from db.dependencies import commit
+from db.models.confirm import ConfirmCode
+from db.models.user import User
+from schemas.user import UserRegisterSchema
+from services.confirm import ConfirmService
+from services.jwt import auth_strategy
 
 
 @pytest.mark.anyio
@@ -20,6 +39,71 @@ async def test_signup_returns_201_and_user_data(client: AsyncClient) -> None:
     assert "updated_at" in data
 
 
+@pytest.mark.anyio
+async def test_signup_with_registered_email_returns_400(client: AsyncClient) -> None:
+    payload = {
+        "email": "twice@example.com",
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    assert (await client.post("/api/v1/auth/signup", json=payload)).status_code == 201
+
+    response = await client.post("/api/v1/auth/signup", json=payload)
+    assert response.status_code == 400
+    assert response.json()["code"] == "user_already_registered"
+
+
+@pytest.mark.anyio
+async def test_concurrent_signups_for_same_email(_engine: AsyncEngine) -> None:
+    email = "race@example.com"
+    data = UserRegisterSchema(
+        email=email,
+        first_name="string",
+        last_name="string",
+        password="secret123",  # noqa: S106
+        password_confirm="secret123",  # noqa: S106
+    )
+    session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+    async with session_factory() as first, session_factory() as second:
+        try:
+            await UserCRUD(first, ConfirmService(ConfirmCodeCRUD(first))).registration(data)
+            # The second INSERT waits on the first one's uncommitted row instead of duplicating it.
+            racing = asyncio.create_task(UserCRUD(second, ConfirmService(ConfirmCodeCRUD(second))).registration(data))
+            await asyncio.sleep(0.2)
+            assert not racing.done()
+
+            await first.commit()
+            with pytest.raises(UserAlreadyRegistered):
+                await racing
+        finally:
+            await second.rollback()
+            await first.execute(delete(ConfirmCode).where(ConfirmCode.email == email))
+            await first.execute(delete(User).where(User.email == email))
+            await first.commit()
+
+
+@pytest.mark.anyio
+async def test_verify_already_verified_user_returns_success(client: AsyncClient) -> None:
+    payload = {
+        "email": "verified@example.com",
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    await client.post("/api/v1/auth/signup", json=payload)
+    confirm_payload = {"email": payload["email"], "code": "1111"}
+    assert (await client.post("/api/v1/auth/verify", json=confirm_payload)).status_code == 200
+
+    response = await client.post("/api/v1/auth/verify", json=confirm_payload)
+    assert response.json() == {"detail": "Email confirmed successfully"}
+
+    response = await client.post("/api/v1/auth/verify", json={"email": "nobody@example.com", "code": "1111"})
+    assert response.status_code == 404
+
+
 @pytest.mark.anyio
 async def test_signup_with_missing_fields_returns_422(client: AsyncClient) -> None:
     payload = {
@@ -88,3 +172,176 @@ async def test_refresh_returns_200_and_new_access_token(client: AsyncClient) ->
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_authorizes_from_token_claims(client: AsyncClient, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(jwt_settings, "stateless", True)
+    monkeypatch.setattr(auth_strategy, "stateless", True)
+
+    payload = {
+        "email": "stateless@example.com",
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    await client.post("/api/v1/auth/signup", json=payload)
+    await client.post("/api/v1/auth/verify", json={"email": payload["email"], "code": "1111"})
+    response = await client.post("/api/v1/auth/login", json={"email": payload["email"], "password": "secret123"})
+    access_token = response.json()["access_token"]
+
+    claims = jwt.decode(access_token, options={"verify_signature": False})
+    assert claims["role"] == "USER"
+    assert claims["is_verified"] is True
+    assert claims["ver"] == 0
+
+    async def _no_db_lookup(*args: object, **kwargs: object) -> None:
+        raise AssertionError("stateless mode must not load the user")
+
+    monkeypatch.setattr(UserCRUD, "get_by_id", _no_db_lookup)
+    response = await client.get("/api/v1/users/?limit=2", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 403
+
+
+async def _stateless_login(client: AsyncClient, email: str) -> dict[str, str]:
+    payload = {
+        "email": email,
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    await client.post("/api/v1/auth/signup", json=payload)
+    await client.post("/api/v1/auth/verify", json={"email": email, "code": "1111"})
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_rejects_revoked_token_versions(
+    client: AsyncClient, dbsession: AsyncSession, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(jwt_settings, "stateless", True)
+    monkeypatch.setattr(auth_strategy, "stateless", True)
+    headers = await _stateless_login(client, "stateless-revoked@example.com")
+    claims = jwt.decode(headers["Authorization"].removeprefix("Bearer "), options={"verify_signature": False})
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+
+    user_crud = UserCRUD(session=dbsession, confirm_service=ConfirmService(ConfirmCodeCRUD(dbsession)))
+    await user_crud.set_role(claims["sub_id"], UserRole.ADMIN)
+    await commit(dbsession)
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 401
+
+    response = await client.post(
+        "/api/v1/auth/login", json={"email": "stateless-revoked@example.com", "password": "secret123"}
+    )
+    new_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert (await client.get("/api/v1/users/me", headers=new_headers)).status_code == 200
+
+    # Another process learns about the bump when it rebuilds its revocation list.
+    other_process = RevocationList(capacity=1000, false_positive_rate=0.001)
+    revoked_key = revoked_version_key(claims["sub_id"], claims["ver"])
+    assert not other_process.might_be_revoked(revoked_key)
+    await other_process.rebuild(async_sessionmaker(dbsession.bind))
+    assert other_process.might_be_revoked(revoked_key)
+
+
+@pytest.mark.anyio
+async def test_stateless_mode_rejects_tokens_of_deleted_users(
+    client: AsyncClient, admin_jwt_token: str, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(jwt_settings, "stateless", True)
+    monkeypatch.setattr(auth_strategy, "stateless", True)
+    headers = await _stateless_login(client, "stateless-deleted@example.com")
+    user_id = jwt.decode(headers["Authorization"].removeprefix("Bearer "), options={"verify_signature": False})[
+        "sub_id"
+    ]
+
+    response = await client.delete(f"/api/v1/users/{user_id}", headers={"Authorization": f"Bearer {admin_jwt_token}"})
+    assert response.status_code == 204
+    response = await client.patch("/api/v1/users/", json={"first_name": "ghost"}, headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_refresh_rotates_and_reuse_revokes_family(client: AsyncClient) -> None:
+    payload = {
+        "email": "rotate@example.com",
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    await client.post("/api/v1/auth/signup", json=payload)
+    await client.post("/api/v1/auth/verify", json={"email": payload["email"], "code": "1111"})
+    response = await client.post("/api/v1/auth/login", json={"email": payload["email"], "password": "secret123"})
+    first_token = response.json()["refresh_token"]
+
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": first_token})
+    assert response.status_code == 200
+    second_token = response.json()["refresh_token"]
+    assert second_token != first_token
+
+    # Replaying the spent token revokes the whole family, including the fresh token.
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": first_token})
+    assert response.status_code == 401
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": second_token})
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_tokens_are_only_accepted_for_their_type(client: AsyncClient) -> None:
+    payload = {
+        "email": "typ@example.com",
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    await client.post("/api/v1/auth/signup", json=payload)
+    await client.post("/api/v1/auth/verify", json={"email": payload["email"], "code": "1111"})
+    tokens = (await client.post("/api/v1/auth/login", json={"email": payload["email"], "password": "secret123"})).json()
+    assert jwt.decode(tokens["access_token"], options={"verify_signature": False})["typ"] == "access"
+    assert jwt.decode(tokens["refresh_token"], options={"verify_signature": False})["typ"] == "refresh"
+
+    response = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 401
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+    # Neither attempt spent or revoked the refresh token.
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_logout_revokes_access_and_refresh_tokens(client: AsyncClient) -> None:
+    payload = {
+        "email": "logout@example.com",
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+    await client.post("/api/v1/auth/signup", json=payload)
+    await client.post("/api/v1/auth/verify", json={"email": payload["email"], "code": "1111"})
+    response = await client.post("/api/v1/auth/login", json={"email": payload["email"], "password": "secret123"})
+    refresh_token = response.json()["refresh_token"]
+    # Log out with an access token issued by a refresh of the same login session.
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    refresh_token = response.json()["refresh_token"]
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.post("/api/v1/auth/logout", headers=headers)
+    assert response.status_code == 204
+
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 401
+    response = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {refresh_token}"})
+    assert response.status_code == 401
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
@@ -0,0 +1,105 @@
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+from sqlalchemy import Select, and_, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.prometheus import get_metrics
+from db.crud.confirm import ConfirmCodeCRUD, PostgresConfirmCodeStore
+from db.crud.user import UserCRUD
+from db.models.confirm import ConfirmCode
+from db.models.user import User
+from services.confirm import ConfirmService
+
+
+def _naive(delta: timedelta) -> datetime:
+    return (datetime.now(UTC) + delta).replace(tzinfo=None)
+
+
+def _users(prefix: str, count: int, is_verified: bool, age: timedelta) -> list[dict[str, object]]:
+    return [
+        {"email": f"{prefix}{i}@example.com", "password": "x", "is_verified": is_verified, "created_at": _naive(-age)}
+        for i in range(count)
+    ]
+
+
+def _user_crud(session: AsyncSession) -> UserCRUD:
+    return UserCRUD(session=session, confirm_service=ConfirmService(ConfirmCodeCRUD(session)))
+
+
+@pytest.mark.anyio
+async def test_delete_old_unverified_users_in_batches(dbsession: AsyncSession) -> None:
+    await dbsession.execute(insert(User), _users("stale", 5, False, timedelta(days=3)))
+    await dbsession.execute(insert(User), _users("verified", 2, True, timedelta(days=3)))
+    await dbsession.execute(insert(User), _users("fresh", 2, False, timedelta(hours=1)))
+    rows_deleted = get_metrics().cleanup_rows_deleted.labels(table="custom_user")
+    before = rows_deleted._value.get()
+
+    assert await _user_crud(dbsession).delete_old_unverified_users(batch_size=2) == 5
+
+    assert rows_deleted._value.get() - before == 5
+    emails = set((await dbsession.scalars(select(User.email))).all())
+    assert emails == {"verified0@example.com", "verified1@example.com", "fresh0@example.com", "fresh1@example.com"}
+
+
+@pytest.mark.anyio
+async def test_cleanup_batches_use_is_verified_index(
+    dbsession: AsyncSession, explain: Callable[[Select[Any]], Awaitable[str]]
+) -> None:
+    await dbsession.execute(insert(User), _users("plan", 4500, True, timedelta(days=3)))
+    await dbsession.execute(insert(User), _users("unverified", 500, False, timedelta(days=3)))
+    await dbsession.execute(text("ANALYZE custom_user"))
+    await dbsession.execute(text("SET LOCAL enable_seqscan = off"))
+
+    stale = and_(User.is_verified.is_(False), User.created_at < _naive(-timedelta(days=2)))
+    plan = await explain(select(User.id).where(stale).limit(1000))
+
+    assert "ix_custom_user_is_verified_created_at" in plan
+
+
+@pytest.mark.anyio
+async def test_cleanup_skips_locked_rows(_engine: AsyncEngine) -> None:
+    session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+    async with session_factory() as session:
+        await session.execute(insert(User), _users("locked", 2, False, timedelta(days=3)))
+        await session.commit()
+
+    try:
+        async with session_factory() as holder, session_factory() as cleaner:
+            # A live request still holds this user.
+            await holder.execute(select(User).where(User.email == "locked0@example.com").with_for_update())
+            assert await _user_crud(cleaner).delete_old_unverified_users() == 1
+            await holder.rollback()
+            assert await _user_crud(cleaner).delete_old_unverified_users() == 1
+    finally:
+        async with session_factory() as session:
+            await session.execute(text("DELETE FROM custom_user WHERE email LIKE 'locked%'"))
+            await session.commit()
+
+
+@pytest.mark.anyio
+async def test_purge_stale_confirm_codes(dbsession: AsyncSession) -> None:
+    await dbsession.execute(insert(User), _users("owner", 3, False, timedelta(hours=1)))
+    now = datetime.now(UTC)
+    store = PostgresConfirmCodeStore(dbsession)
+    for email in ["owner0@example.com", "owner1@example.com", "owner2@example.com", "orphan@example.com"]:
+        await store.prepare_and_save_code(email, 1111)
+    lapsed = {
+        # Code and locks lapsed long ago.
+        "owner0@example.com": now - timedelta(minutes=ConfirmCode.RESEND_BLOCK_MINUTES + 1),
+        # Lapsed recently: its resend count must still hold.
+        "owner1@example.com": now - timedelta(minutes=1),
+    }
+    for email, time in lapsed.items():
+        await dbsession.execute(
+            update(ConfirmCode)
+            .where(ConfirmCode.email == email)
+            .values(expire_time=time, resend_unlock_time=time, unlock_time=None)
+        )
+
+    assert await store.purge_stale(batch_size=1) == 2
+
+    emails = set((await dbsession.scalars(select(ConfirmCode.email))).all())
+    assert emails == {"owner1@example.com", "owner2@example.com"}
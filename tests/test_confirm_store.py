@@ -0,0 +1,180 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from httpx import AsyncClient
+from pytest import MonkeyPatch
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.exceptions.confirm import ConfirmError
+from core.settings import confirm_settings
+from db.crud.confirm import PostgresConfirmCodeStore
+from db.crud.confirm_redis import RedisConfirmCodeStore
+from db.models.confirm import ConfirmCode
+
+EMAIL = "store@example.com"
+
+
+@pytest.fixture
+async def redis() -> AsyncGenerator[FakeAsyncRedis, None]:
+    client = FakeAsyncRedis(decode_responses=True)
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+@pytest.fixture
+def store(redis: FakeAsyncRedis) -> RedisConfirmCodeStore:
+    return RedisConfirmCodeStore(redis)
+
+
+@pytest.mark.anyio
+async def test_code_is_consumed_and_keys_removed(store: RedisConfirmCodeStore, redis: FakeAsyncRedis) -> None:
+    await store.prepare_and_save_code(EMAIL, 1234)
+    assert 0 < await redis.ttl(f"confirm:{{{EMAIL}}}:code") <= ConfirmCode.SMS_EXPIRY_SECONDS
+
+    assert await store.verify_code(EMAIL, 1234)
+    assert await redis.keys("confirm:*") == []
+    with pytest.raises(ConfirmError, match="Invalid confirmation code"):
+        await store.verify_code(EMAIL, 1234)
+
+
+@pytest.mark.anyio
+async def test_wrong_codes_lock_verification(store: RedisConfirmCodeStore, redis: FakeAsyncRedis) -> None:
+    await store.prepare_and_save_code(EMAIL, 1234)
+    for _ in range(ConfirmCode.TRY_COUNT):
+        with pytest.raises(ConfirmError, match="Invalid confirmation code"):
+            await store.verify_code(EMAIL, 4321)
+    # The try counter expires with the code it counts against.
+    assert 0 < await redis.ttl(f"confirm:{{{EMAIL}}}:tries") <= ConfirmCode.SMS_EXPIRY_SECONDS
+
+    with pytest.raises(ConfirmError, match=r"Try again in 0[12]:\d\d"):
+        await store.verify_code(EMAIL, 1234)
+
+
+@pytest.mark.anyio
+async def test_resend_cooldown_and_limit(store: RedisConfirmCodeStore, redis: FakeAsyncRedis) -> None:
+    await store.prepare_and_save_code(EMAIL, 1111)
+    with pytest.raises(ConfirmError, match="Resend blocked, try again in 0[12]:"):
+        await store.prepare_and_save_code(EMAIL, 2222)
+
+    for code in range(2, ConfirmCode.RESEND_COUNT + 1):
+        await redis.delete(f"confirm:{{{EMAIL}}}:resend_lock")
+        await store.prepare_and_save_code(EMAIL, code)
+    await redis.delete(f"confirm:{{{EMAIL}}}:resend_lock")
+
+    with pytest.raises(ConfirmError) as exc_info:
+        await store.prepare_and_save_code(EMAIL, 9999)
+    assert exc_info.value.values == {"expired": f"{ConfirmCode.RESEND_BLOCK_MINUTES:02d}:00"}
+    # The latest code sent before the lock is still valid.
+    assert await store.verify_code(EMAIL, ConfirmCode.RESEND_COUNT)
+
+
+@pytest.mark.anyio
+async def test_expired_code(store: RedisConfirmCodeStore, redis: FakeAsyncRedis) -> None:
+    await store.prepare_and_save_code(EMAIL, 1234)
+    await redis.delete(f"confirm:{{{EMAIL}}}:code")
+
+    with pytest.raises(ConfirmError, match="Time for confirmation has expired"):
+        await store.verify_code(EMAIL, 1234)
+
+
+@pytest.mark.anyio
+async def test_postgres_store_keeps_one_row_per_email(dbsession: AsyncSession) -> None:
+    store = PostgresConfirmCodeStore(dbsession)
+    await store.prepare_and_save_code(EMAIL, 1111)
+    with pytest.raises(ConfirmError, match="Resend blocked"):
+        await store.prepare_and_save_code(EMAIL, 2222)
+
+    sms_confirm = await store.get_or_create(EMAIL, 3333)
+    assert (sms_confirm.code, sms_confirm.resend_count) == (1111, 1)
+    count = await dbsession.scalar(select(func.count()).select_from(ConfirmCode).where(ConfirmCode.email == EMAIL))
+    assert count == 1
+
+
+@pytest.mark.anyio
+async def test_postgres_store_verify_accounting(dbsession: AsyncSession) -> None:
+    store = PostgresConfirmCodeStore(dbsession)
+    await store.prepare_and_save_code(EMAIL, 1111)
+    for _ in range(ConfirmCode.TRY_COUNT):
+        with pytest.raises(ConfirmError, match="Invalid confirmation code"):
+            await store.verify_code(EMAIL, 2222)
+
+    # The spent allowance turns into a lock that holds even for the right code.
+    with pytest.raises(ConfirmError, match=r"Try again in 0[12]:\d\d"):
+        await store.verify_code(EMAIL, 1111)
+    with pytest.raises(ConfirmError, match="Try again in"):
+        await store.verify_code(EMAIL, 1111)
+
+    past = datetime.now(UTC) - timedelta(seconds=1)
+    await dbsession.execute(update(ConfirmCode).where(ConfirmCode.email == EMAIL).values(unlock_time=past))
+    assert await store.verify_code(EMAIL, 1111)
+    assert await store.get_by_email(EMAIL) is None
+
+
+@pytest.mark.anyio
+async def test_postgres_store_expired_code(dbsession: AsyncSession) -> None:
+    store = PostgresConfirmCodeStore(dbsession)
+    await store.prepare_and_save_code(EMAIL, 1111)
+    past = datetime.now(UTC) - timedelta(seconds=1)
+    await dbsession.execute(update(ConfirmCode).where(ConfirmCode.email == EMAIL).values(expire_time=past))
+
+    with pytest.raises(ConfirmError, match="Time for confirmation has expired"):
+        await store.verify_code(EMAIL, 1111)
+
+
+@pytest.mark.anyio
+async def test_postgres_store_parallel_guesses_cannot_exceed_try_count(_engine: AsyncEngine) -> None:
+    session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+    email = "guesses@example.com"
+    async with session_factory() as session:
+        await PostgresConfirmCodeStore(session).prepare_and_save_code(email, 1111)
+        await session.commit()
+
+    async def guess(code: int) -> str:
+        async with session_factory() as session:
+            try:
+                await PostgresConfirmCodeStore(session).verify_code(email, code)
+            except ConfirmError as e:
+                return str(e.detail)
+            await session.commit()
+            return "confirmed"
+
+    try:
+        outcomes = await asyncio.gather(*(guess(2000 + i) for i in range(ConfirmCode.TRY_COUNT + 5)))
+        assert outcomes.count("Invalid confirmation code") == ConfirmCode.TRY_COUNT
+        assert all(outcome.startswith("Try again in") for outcome in outcomes if outcome != "Invalid confirmation code")
+        # Still locked: the right code arriving after the guesses is refused.
+        assert (await guess(1111)).startswith("Try again in")
+    finally:
+        async with session_factory() as session:
+            await session.execute(delete(ConfirmCode).where(ConfirmCode.email == email))
+            await session.commit()
+
+
+@pytest.mark.anyio
+async def test_signup_and_verify_with_redis_store(
+    client: AsyncClient,
+    store: RedisConfirmCodeStore,
+    monkeypatch: MonkeyPatch,
+    query_counter: list[str],
+) -> None:
+    monkeypatch.setattr(confirm_settings, "store", "redis")
+    monkeypatch.setattr("db.crud.confirm.get_redis_confirm_code_store", lambda: store)
+    payload = {
+        "email": EMAIL,
+        "first_name": "string",
+        "last_name": "string",
+        "password": "secret123",
+        "password_confirm": "secret123",
+    }
+
+    assert (await client.post("/api/v1/auth/signup", json=payload)).status_code == 201
+    response = await client.post("/api/v1/auth/verify", json={"email": EMAIL, "code": "1111"})
+
+    assert response.json() == {"detail": "Email confirmed successfully"}
+    assert not [statement for statement in query_counter if "confirm_code" in statement]
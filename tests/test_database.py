@@ -0,0 +1,196 @@
+import os
+import time
+from typing import Any
+
+import pytest
+from pytest import MonkeyPatch
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.database import LAST_WRITE_COOKIE, ReplicaRouter, engine_options, instrument_engine
+from core.prometheus import get_metrics
+from core.settings import settings
+from db.dependencies import get_db_session, get_read_session_factory, on_commit
+
+
+def _request(method: str, cookie: str = "") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": "/",
+            "headers": [(b"cookie", cookie.encode())] if cookie else [],
+            "client": ("127.0.0.1", 1234),
+        }
+    )
+
+
+async def _session_role(request: Request, response: Response | None = None) -> Any:
+    sessions = get_db_session(request, response or Response())
+    session = await anext(sessions)
+    await sessions.aclose()
+    return session.info["role"]
+
+
+def _cookie(response: Response) -> str:
+    """The ``Cookie`` header a client sends back after ``response``."""
+    return response.headers["set-cookie"].split(";")[0]
+
+
+def test_replica_router_read_your_writes_window() -> None:
+    router = ReplicaRouter(read_your_writes_window=60, max_lag=10)
+    response = Response()
+
+    router.mark_write(response)
+    last_write = _cookie(response).removeprefix(f"{LAST_WRITE_COOKIE}=")
+    assert "Max-Age=60" in response.headers["set-cookie"]
+    assert not router.use_replica(last_write)
+    assert router.use_replica(None)
+    assert router.use_replica("garbage")
+    assert router.use_replica(str(time.time() - 61))
+    # A forged timestamp far in the future does not pin the client to the primary.
+    assert router.use_replica(str(time.time() + 3600))
+
+    router.lag = 30
+    assert not router.use_replica(None)
+
+
+@pytest.fixture
+def routed_factories(monkeypatch: MonkeyPatch, _engine: AsyncEngine) -> None:
+    primary_factory = async_sessionmaker(_engine, info={"role": "primary"})
+    replica_factory = async_sessionmaker(_engine, info={"role": "replica"})
+    monkeypatch.setattr("db.dependencies.get_session_factory", lambda: primary_factory)
+    monkeypatch.setattr("db.dependencies.get_replica_session_factory", lambda: replica_factory)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("routed_factories")
+async def test_get_db_session_routes_reads_to_replica(monkeypatch: MonkeyPatch) -> None:
+    router = ReplicaRouter(read_your_writes_window=60, max_lag=10)
+    monkeypatch.setattr("db.dependencies.get_replica_router", lambda: router)
+
+    assert await _session_role(_request("GET")) == "replica"
+    response = Response()
+    assert await _session_role(_request("PATCH"), response) == "primary"
+    # The client that just wrote keeps reading from the primary; others do not.
+    assert await _session_role(_request("GET", _cookie(response))) == "primary"
+    assert await _session_role(_request("GET")) == "replica"
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("routed_factories")
+async def test_read_your_writes_window_holds_across_processes(monkeypatch: MonkeyPatch) -> None:
+    # Each worker process has a router of its own; nothing is shared between them.
+    writer_process = ReplicaRouter(read_your_writes_window=60, max_lag=10)
+    reader_process = ReplicaRouter(read_your_writes_window=60, max_lag=10)
+
+    monkeypatch.setattr("db.dependencies.get_replica_router", lambda: writer_process)
+    response = Response()
+    await _session_role(_request("POST"), response)
+
+    monkeypatch.setattr("db.dependencies.get_replica_router", lambda: reader_process)
+    assert await _session_role(_request("GET", _cookie(response))) == "primary"
+    assert await _session_role(_request("GET")) == "replica"
+
+
+@pytest.mark.usefixtures("routed_factories")
+def test_read_session_factory_follows_replica_router(monkeypatch: MonkeyPatch) -> None:
+    router = ReplicaRouter(read_your_writes_window=60, max_lag=10)
+    monkeypatch.setattr("db.dependencies.get_replica_router", lambda: router)
+    response = Response()
+    router.mark_write(response)
+
+    assert get_read_session_factory(_request("GET")).kw["info"]["role"] == "replica"
+    assert get_read_session_factory(_request("GET", _cookie(response))).kw["info"]["role"] == "primary"
+    router.lag = 30
+    assert get_read_session_factory(_request("GET")).kw["info"]["role"] == "primary"
+
+
+@pytest.mark.anyio
+async def test_get_db_session_runs_on_commit_callbacks_after_commit(
+    monkeypatch: MonkeyPatch, _engine: AsyncEngine
+) -> None:
+    monkeypatch.setattr("db.dependencies.get_session_factory", lambda: async_sessionmaker(_engine))
+    monkeypatch.setattr("db.dependencies.get_replica_session_factory", lambda: None)
+    calls: list[str] = []
+
+    sessions = get_db_session(_request("POST"), Response())
+    session = await anext(sessions)
+    on_commit(session, lambda: calls.append("committed"))
+    assert calls == []
+    with pytest.raises(StopAsyncIteration):
+        await anext(sessions)
+    assert calls == ["committed"]
+
+    sessions = get_db_session(_request("POST"), Response())
+    session = await anext(sessions)
+    on_commit(session, lambda: calls.append("rolled back"))
+    with pytest.raises(RuntimeError):
+        await sessions.athrow(RuntimeError())
+    assert calls == ["committed"]
+
+
+def test_engine_options_for_transaction_pooler() -> None:
+    direct = engine_options(settings.model_copy(update={"postgres_pool_size": 5, "postgres_pool_recycle": 300}))
+    assert direct["connect_args"] == {}
+    assert direct["pool_size"] == 5
+    assert direct["pool_recycle"] == 300
+
+    pooled = engine_options(settings.model_copy(update={"postgres_pooler": "transaction", "postgres_null_pool": True}))
+    connect_args = pooled["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+    assert pooled["poolclass"] is NullPool
+    assert "pool_size" not in pooled
+
+
+@pytest.mark.anyio
+async def test_transaction_pooler_engine_runs_queries() -> None:
+    options = engine_options(settings.model_copy(update={"postgres_pooler": "transaction"}))
+    engine = create_async_engine(settings.postgres_url, **options)
+    try:
+        for n in range(3):
+            async with engine.begin() as connection:
+                assert await connection.scalar(text("SELECT CAST(:n AS integer) + 1"), {"n": n}) == n + 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_pool_metrics(_engine: AsyncEngine) -> None:
+    options = engine_options(settings.model_copy(update={"postgres_pool_size": 1, "postgres_max_overflow": 1}))
+    engine = create_async_engine(settings.postgres_url, **options)
+    instrument_engine(engine, "metrics-test")
+    metrics = get_metrics()
+    labels = {"pool": "metrics-test", "worker": str(os.getpid())}
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            assert metrics.db_pool_checked_out.labels(**labels)._value.get() == 2
+            assert metrics.db_pool_overflow.labels(**labels)._value.get() == 1
+            await first.scalar(text("SELECT 1"))
+            await second.scalar(text("SELECT 1"))
+        assert metrics.db_pool_checked_out.labels(**labels)._value.get() == 0
+        assert metrics.db_pool_overflow.labels(**labels)._value.get() == 0
+        async with engine.connect() as connection:
+            pid = await connection.scalar(text("SELECT pg_backend_pid()"))
+
+        # The pooled connection dies behind the pool's back; the next checkout replaces it.
+        async with _engine.connect() as connection:
+            await connection.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+        async with engine.connect() as connection:
+            assert await connection.scalar(text("SELECT pg_backend_pid()")) != pid
+        assert metrics.db_pool_pre_ping_failures.labels(**labels)._value.get() == 1
+    finally:
+        await engine.dispose()
+
+    for histogram in (metrics.db_pool_checkout_wait, metrics.db_pool_connection_age):
+        counts = [
+            sample.value
+            for sample in histogram.collect()[0].samples
+            if sample.name.endswith("_count") and sample.labels == labels
+        ]
+        assert counts == [4]
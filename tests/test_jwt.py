@@ -0,0 +1,45 @@
+import time
+
+import jwt
+import pytest
+from pytest import MonkeyPatch
+
+from core.auth.jwt_auth import JWTHandler
+from core.auth.keys import KeyRing, SigningKey
+from core.exceptions.base import APIException
+
+SECRET = "test-secret-key-with-enough-entropy-for-hs256"  # noqa: S105
+KEY_RING = KeyRing(SigningKey(algorithm="HS256", verifying_key=SECRET, signing_key=SECRET))
+
+
+def _token(exp: int) -> str:
+    return jwt.encode(
+        {"sub_id": 1, "iat": exp - 60, "exp": exp, "jti": "test", "typ": "access"}, SECRET, algorithm="HS256"
+    )
+
+
+def test_verify_token_serves_repeated_tokens_from_cache(monkeypatch: MonkeyPatch) -> None:
+    handler = JWTHandler(KEY_RING, cache_size=10)
+    token = _token(int(time.time()) + 60)
+    first = handler.verify_token(token)
+
+    def _no_decode(*args: object, **kwargs: object) -> None:
+        raise AssertionError("cached token must not be decoded again")
+
+    monkeypatch.setattr(KEY_RING, "decode", _no_decode)
+    assert handler.verify_token(token) is first
+
+
+def test_verify_token_does_not_serve_cached_token_after_exp(monkeypatch: MonkeyPatch) -> None:
+    handler = JWTHandler(KEY_RING, cache_size=10)
+    exp = int(time.time()) + 60
+    token = _token(exp)
+    handler.verify_token(token)
+
+    def _expired(*args: object, **kwargs: object) -> None:
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    monkeypatch.setattr(time, "time", lambda: exp + 1)
+    monkeypatch.setattr(KEY_RING, "decode", _expired)
+    with pytest.raises(APIException):
+        handler.verify_token(token)
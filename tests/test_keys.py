@@ -0,0 +1,47 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from httpx import AsyncClient
+from pytest import MonkeyPatch
+
+from core.auth.keys import KeyRing, asymmetric_key
+
+
+def _payload() -> dict[str, object]:
+    return {"sub_id": 1, "iat": 0, "exp": 2**31, "jti": "test"}
+
+
+def test_key_ring_verifies_tokens_of_retired_keys() -> None:
+    old_key = ed25519.Ed25519PrivateKey.generate()
+    new_key = ed25519.Ed25519PrivateKey.generate()
+    old_ring = KeyRing(asymmetric_key("EdDSA", private_key=old_key))
+    old_token = old_ring.encode(_payload())
+
+    rotated_ring = KeyRing(
+        asymmetric_key("EdDSA", private_key=new_key),
+        retired=[asymmetric_key("EdDSA", public_key=old_key.public_key())],
+    )
+    new_token = rotated_ring.encode(_payload())
+
+    assert jwt.get_unverified_header(new_token)["kid"] == rotated_ring.active.kid
+    assert rotated_ring.decode(old_token)["sub_id"] == 1
+    assert rotated_ring.decode(new_token)["sub_id"] == 1
+    with pytest.raises(jwt.InvalidKeyError):
+        old_ring.decode(new_token)
+
+
+@pytest.mark.anyio
+async def test_jwks_lists_public_keys(client: AsyncClient, monkeypatch: MonkeyPatch) -> None:
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    key_ring = KeyRing(asymmetric_key("EdDSA", private_key=private_key))
+    monkeypatch.setattr("api.well_known.get_key_ring", lambda: key_ring)
+
+    response = await client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    [jwk] = response.json()["keys"]
+    assert jwk["kid"] == key_ring.active.kid
+    assert "d" not in jwk
+
+    public_key = jwt.PyJWK(jwk).key
+    assert jwt.decode(key_ring.encode(_payload()), public_key, algorithms=["EdDSA"])["sub_id"] == 1
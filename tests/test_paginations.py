@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from services.paginations import PaginationHelper, RowCountCache
+
+
+def test_cursor_round_trip() -> None:
+    cursor = PaginationHelper.encode_cursor(42, "prev")
+    assert PaginationHelper.decode_cursor(cursor) == (42, "prev")
+
+
+@pytest.mark.anyio
+async def test_row_count_cache_serves_stale_value_while_refreshing() -> None:
+    counts = iter([10, 20])
+    loads = 0
+
+    async def load() -> int:
+        nonlocal loads
+        loads += 1
+        return next(counts)
+
+    row_count_cache = RowCountCache(ttl=0)
+    assert await row_count_cache.get("users", load) == 10
+    # Expired: the old value is returned at once and a refresh runs in the background.
+    assert await row_count_cache.get("users", load) == 10
+    await asyncio.sleep(0)
+    assert loads == 2
+    assert await row_count_cache.get("users", load) == 20
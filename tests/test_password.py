@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from core.auth.password import (
+    Argon2Hasher,
+    BcryptHasher,
+    PasswordContext,
+    PasswordExecutor,
+)
+from core.exceptions.auth import PasswordHasherBusyError
+
+FAST_ARGON2 = Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1)
+FAST_BCRYPT = BcryptHasher(rounds=4)
+
+
+def _context() -> PasswordContext:
+    return PasswordContext(default=FAST_ARGON2, hashers=[FAST_BCRYPT])
+
+
+@pytest.mark.anyio
+async def test_password_executor_hash_and_verify() -> None:
+    executor = PasswordExecutor(context=_context(), workers=1, queue_size=1)
+    try:
+        hashed = await executor.hash("secret123")
+        assert hashed.startswith("$argon2id$")
+        assert await executor.verify("secret123", hashed)
+        assert not await executor.verify("wrong-password", hashed)
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_password_executor_hash_many_preserves_order() -> None:
+    executor = PasswordExecutor(context=_context(), workers=2, queue_size=0)
+    try:
+        passwords = [f"secret{i}" for i in range(5)]
+        hashes = await executor.hash_many(passwords)
+        assert len(hashes) == 5
+        assert all(FAST_ARGON2.verify(password, hashed) for password, hashed in zip(passwords, hashes, strict=True))
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_verify_is_not_stuck_behind_hash_many() -> None:
+    slow_bcrypt = BcryptHasher(rounds=8)
+    executor = PasswordExecutor(
+        context=PasswordContext(default=slow_bcrypt, hashers=[FAST_ARGON2]),
+        workers=2,
+        queue_size=0,
+        batch_size=2,
+    )
+    try:
+        hashed = await executor.hash("secret123")
+        started = time.perf_counter()
+        slow_bcrypt.hash("secret123")
+        hash_seconds = time.perf_counter() - started
+
+        import_task = asyncio.create_task(executor.hash_many([f"secret{i}" for i in range(60)]))
+        await asyncio.sleep(hash_seconds * 3)
+        started = time.perf_counter()
+        assert await executor.verify("secret123", hashed)
+        verify_seconds = time.perf_counter() - started
+
+        assert not import_task.done()
+        # One chunk of two hashes at most, plus the verify itself and CPU contention;
+        # before, the verify queued behind two jobs of 30 hashes each.
+        assert verify_seconds < hash_seconds * 10
+        assert len(await import_task) == 60
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_password_executor_rejects_jobs_when_queue_is_full() -> None:
+    executor = PasswordExecutor(context=_context(), workers=1, queue_size=0)
+    try:
+        results = await asyncio.gather(
+            executor.hash("secret123"),
+            executor.hash("secret456"),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], str)
+        assert isinstance(results[1], PasswordHasherBusyError)
+        assert results[1].status_code == 503
+    finally:
+        executor.shutdown()
+
+
+def test_verify_and_update_upgrades_outdated_hashes() -> None:
+    context = _context()
+
+    legacy_hash = FAST_BCRYPT.hash("secret123")
+    is_valid, new_hash = context.verify_and_update("secret123", legacy_hash)
+    assert is_valid
+    assert new_hash is not None and new_hash.startswith("$argon2id$")
+
+    weaker_hash = Argon2Hasher(time_cost=2, memory_cost=1024, parallelism=1).hash("secret123")
+    assert context.verify_and_update("secret123", weaker_hash)[1] is not None
+
+    current_hash = context.hash("secret123")
+    assert context.verify_and_update("secret123", current_hash) == (True, None)
+    assert context.verify_and_update("wrong-password", legacy_hash) == (False, None)
@@ -0,0 +1,36 @@
+import time
+
+from pytest import MonkeyPatch
+
+from core.auth.principal import Principal, PrincipalCache
+from core.constants.role import UserRole
+
+
+def _principal(user_id: int) -> Principal:
+    return Principal(id=user_id, role=UserRole.USER, is_verified=True, token_version=0)
+
+
+def test_principal_cache_evicts_least_recently_used() -> None:
+    cache = PrincipalCache(maxsize=2, ttl=60)
+    cache.set(_principal(1))
+    cache.set(_principal(2))
+    assert cache.get(1) is not None
+
+    cache.set(_principal(3))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+
+
+def test_principal_cache_expires_and_invalidates(monkeypatch: MonkeyPatch) -> None:
+    cache = PrincipalCache(maxsize=10, ttl=30)
+    cache.set(_principal(1))
+    cache.set(_principal(2))
+
+    cache.invalidate(2)
+    assert cache.get(2) is None
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+    assert cache.get(1) is None
@@ -0,0 +1,117 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.prometheus import get_metrics
+from core.statements import fingerprint, instrument_statements
+
+USER = {
+    "email": "queries@mail.com",
+    "first_name": "string",
+    "last_name": "string",
+    "password": "secret123",
+    "password_confirm": "secret123",
+}
+
+
+async def _signup(client: AsyncClient) -> None:
+    await client.post("/api/v1/auth/signup", json=USER)
+
+
+async def _verify(client: AsyncClient) -> None:
+    await client.post("/api/v1/auth/verify", json={"email": USER["email"], "code": "1111"})
+
+
+async def _login(client: AsyncClient) -> dict[str, str]:
+    response = await client.post("/api/v1/auth/login", json={"email": USER["email"], "password": USER["password"]})
+    return response.json()
+
+
+@pytest.mark.anyio
+async def test_signup_query_count(client: AsyncClient, query_counter: list[str]) -> None:
+    response = await client.post("/api/v1/auth/signup", json=USER)
+
+    assert response.status_code == 201
+    # User INSERT ... ON CONFLICT DO NOTHING RETURNING, confirm code lookup and INSERT.
+    assert len(query_counter) == 3
+
+
+@pytest.mark.anyio
+async def test_verify_query_count(client: AsyncClient, query_counter: list[str]) -> None:
+    await _signup(client)
+    query_counter.clear()
+
+    response = await client.post("/api/v1/auth/verify", json={"email": USER["email"], "code": "1111"})
+
+    assert response.json() == {"detail": "Email confirmed successfully"}
+    # The confirm code DELETE ... RETURNING and the user UPDATE ... RETURNING.
+    assert len(query_counter) == 2
+
+
+@pytest.mark.anyio
+async def test_login_query_count(client: AsyncClient, query_counter: list[str]) -> None:
+    await _signup(client)
+    await _verify(client)
+    query_counter.clear()
+
+    tokens = await _login(client)
+
+    assert "access_token" in tokens
+    # User lookup and the refresh token INSERT.
+    assert len(query_counter) == 2
+
+
+@pytest.mark.anyio
+async def test_me_query_count(client: AsyncClient, query_counter: list[str]) -> None:
+    await _signup(client)
+    await _verify(client)
+    tokens = await _login(client)
+    query_counter.clear()
+
+    response = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    assert response.status_code == 200
+    # Principal lookup and the user row.
+    assert len(query_counter) == 2
+
+
+@pytest.mark.anyio
+async def test_update_query_count(client: AsyncClient, query_counter: list[str]) -> None:
+    await _signup(client)
+    await _verify(client)
+    tokens = await _login(client)
+    query_counter.clear()
+
+    response = await client.patch(
+        "/api/v1/users/",
+        json={"first_name": "renamed"},
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+
+    assert response.json()["first_name"] == "renamed"
+    # Principal lookup and UPDATE ... RETURNING.
+    assert len(query_counter) == 2
+
+
+def test_fingerprint_ignores_parameters_and_list_lengths() -> None:
+    select = "SELECT custom_user.id FROM custom_user WHERE custom_user.id IN ($1::INTEGER, $2::INTEGER) LIMIT $3"
+    assert fingerprint(select) == fingerprint(select.replace("$2::INTEGER", "$2::INTEGER, $3::INTEGER"))
+    assert fingerprint("SELECT 1 WHERE 'a' = 'b'") == fingerprint("SELECT  2\nWHERE 'c' = 'd'")
+    assert fingerprint("INSERT INTO t (a) VALUES ($1), ($2)") == fingerprint("INSERT INTO t (a) VALUES ($1)")
+    assert fingerprint(select) != fingerprint(select.replace("custom_user.id IN", "custom_user.email IN"))
+
+
+@pytest.mark.anyio
+async def test_request_query_count_metric(client: AsyncClient, _engine: AsyncEngine, query_counter: list[str]) -> None:
+    instrument_statements(_engine)
+    metrics = get_metrics()
+    labels = {"method": "POST", "endpoint": "/api/v1/auth/signup"}
+    query_count = metrics.request_query_count.labels(**labels)
+    before = query_count._sum.get()
+
+    await _signup(client)
+
+    assert query_count._sum.get() - before == len(query_counter) == 3
+    rows = metrics.sql_statement_rows.labels(fingerprint=fingerprint(query_counter[0]))
+    # The user INSERT ... RETURNING affected one row.
+    assert rows._sum.get() >= 1
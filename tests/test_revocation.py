@@ -0,0 +1,13 @@
+from core.auth.revocation import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom_filter = BloomFilter(capacity=1000, false_positive_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom_filter.add(item)
+
+    assert all(item in bloom_filter for item in items)
+    false_positives = sum(f"other-{i}" in bloom_filter for i in range(10000))
+    assert false_positives < 300
+    assert 0 < bloom_filter.false_positive_rate < 0.02
@@ -0,0 +1,84 @@
+from collections.abc import Iterator
+
+import pytest
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from core.prometheus import RequestQueries, request_queries
+from core.settings import settings
+from core.statements import SlowQueryLog, explain_prefix, parameter_shapes
+
+SLOW_SELECT = text("SELECT count(*) FROM pg_sleep(0.02), generate_series(1, 10) AS n WHERE n::text <> :email")
+
+
+@pytest.fixture
+def messages() -> Iterator[list[str]]:
+    captured: list[str] = []
+    handler = logger.add(captured.append, format="{message}", level="WARNING")
+    try:
+        yield captured
+    finally:
+        logger.remove(handler)
+
+
+@pytest.fixture
+async def engine() -> Iterator[AsyncEngine]:
+    engine = create_async_engine(settings.postgres_url)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+def test_parameter_shapes_hide_values() -> None:
+    assert parameter_shapes(("secret@mail.com", 5, None)) == "(str[15], int, None)"
+    assert parameter_shapes([("a", 1), ("b", 2)]) == "2 x (str[1], int)"
+    assert parameter_shapes({"code": "1234"}) == "{code: str[4]}"
+
+
+def test_explain_prefix_only_analyzes_reads() -> None:
+    assert explain_prefix("SELECT * FROM custom_user") == "EXPLAIN (ANALYZE, BUFFERS) "
+    assert explain_prefix("SELECT * FROM custom_user FOR UPDATE") == "EXPLAIN "
+    assert explain_prefix("WITH confirmed AS (DELETE FROM confirm_code RETURNING id) SELECT 1") == "EXPLAIN "
+    assert explain_prefix("UPDATE custom_user SET is_verified = true") == "EXPLAIN "
+
+
+@pytest.mark.anyio
+async def test_slow_query_log_is_rate_limited(engine: AsyncEngine, messages: list[str]) -> None:
+    slow_query_log = SlowQueryLog(engine, threshold=0.01, max_per_minute=2)
+    slow_query_log.install()
+
+    token = request_queries.set(RequestQueries(endpoint="GET /api/v1/users"))
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            for _ in range(3):
+                await connection.execute(SLOW_SELECT, {"email": "secret@mail.com"})
+    finally:
+        request_queries.reset(token)
+
+    assert len(messages) == 2
+    assert "in GET /api/v1/users" in messages[0]
+    assert "parameters (str[15])" in messages[0]
+    assert "secret@mail.com" not in messages[0]
+
+
+@pytest.mark.anyio
+async def test_slow_query_log_captures_plan(engine: AsyncEngine, messages: list[str]) -> None:
+    slow_query_log = SlowQueryLog(engine, threshold=0.01, max_per_minute=60, explain=True)
+    slow_query_log.install()
+
+    async with engine.connect() as connection:
+        for _ in range(2):
+            await connection.execute(SLOW_SELECT, {"email": "secret@mail.com"})
+    assert slow_query_log._explaining is not None
+    await slow_query_log._explaining
+
+    plans = [message for message in messages if message.startswith("Plan of slow query")]
+    # The second run of the same statement is within the explain interval.
+    assert len(plans) == 1
+    assert "actual time" in plans[0]
+    # Bound values the planner inlined into conditions are masked.
+    assert "Filter: ((n)::text <> ?::text)" in plans[0]
+    assert "secret@mail.com" not in plans[0]
@@ -0,0 +1,155 @@
+import asyncio
+import socket
+from collections.abc import Iterator
+from email.message import EmailMessage
+from typing import Any
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from aiosmtplib import SMTPDataError
+from pytest import MonkeyPatch
+
+from core.celery.tasks.confirm import send_confirm_task
+from core.settings import smtp_settings
+from core.smtp import SMTPPool, SMTPSender, close_smtp_sender
+
+
+class Mailbox:
+    def __init__(self) -> None:
+        self.logins = 0
+        self.messages: list[bytes] = []
+        self.peers: set[Any] = set()
+        # Replies to give instead of accepting the next messages.
+        self.replies: list[str] = []
+
+    def authenticate(self, server: Any, session: Any, envelope: Any, mechanism: str, data: Any) -> AuthResult:
+        self.logins += 1
+        return AuthResult(success=data.login == b"user" and data.password == b"secret")
+
+    async def handle_DATA(self, server: Any, session: Any, envelope: Any) -> str:
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope.content)
+        self.peers.add(session.peer)
+        return "250 OK"
+
+
+@pytest.fixture
+def mailbox() -> Iterator[tuple[Mailbox, int]]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    mailbox = Mailbox()
+    controller = Controller(
+        mailbox,
+        hostname="127.0.0.1",
+        port=port,
+        authenticator=mailbox.authenticate,
+        auth_require_tls=False,
+    )
+    controller.start()
+    try:
+        yield mailbox, port
+    finally:
+        controller.stop()
+
+
+def _pool(port: int, max_size: int = 2, max_idle: float = 30) -> SMTPPool:
+    return SMTPPool(
+        max_size=max_size,
+        max_idle=max_idle,
+        hostname="127.0.0.1",
+        port=port,
+        username="user",
+        password="secret",  # noqa: S106
+        start_tls=False,
+    )
+
+
+def _message(number: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "no-reply@mail.com"
+    message["To"] = f"user{number}@mail.com"
+    message["Subject"] = f"Message {number}"
+    message.set_content("Hello")
+    return message
+
+
+@pytest.mark.anyio
+async def test_pool_reuses_authenticated_connections(mailbox: tuple[Mailbox, int]) -> None:
+    box, port = mailbox
+    pool = _pool(port, max_size=2)
+
+    for number in range(5):
+        await pool.send(_message(number))
+    await asyncio.gather(*(pool.send(_message(number)) for number in range(10)))
+    await pool.close()
+
+    assert len(box.messages) == 15
+    # Concurrent sends are capped at two connections, each authenticated once.
+    assert box.logins == 2
+    assert len(box.peers) == 2
+
+
+@pytest.mark.anyio
+async def test_pool_reconnects_when_server_closes_connection(mailbox: tuple[Mailbox, int]) -> None:
+    box, port = mailbox
+    pool = _pool(port)
+
+    await pool.send(_message(1))
+    box.replies.append("421 Too many messages, closing connection")
+    await pool.send(_message(2))
+    await pool.close()
+
+    assert len(box.messages) == 2
+    assert box.logins == 2
+
+
+@pytest.mark.anyio
+async def test_pool_does_not_resend_rejected_messages(mailbox: tuple[Mailbox, int]) -> None:
+    box, port = mailbox
+    pool = _pool(port)
+
+    await pool.send(_message(1))
+    box.replies.append("550 Mailbox unavailable")
+    with pytest.raises(SMTPDataError):
+        await pool.send(_message(2))
+    await pool.send(_message(3))
+    await pool.close()
+
+    assert len(box.messages) == 2
+    assert box.logins == 2
+
+
+def test_send_confirm_task_shares_worker_connection(mailbox: tuple[Mailbox, int], monkeypatch: MonkeyPatch) -> None:
+    box, port = mailbox
+    for name, value in {
+        "host": "127.0.0.1",
+        "port": port,
+        "user": "user",
+        "password": "secret",
+        "use_tls": False,
+        "sender_email": "no-reply@mail.com",
+    }.items():
+        monkeypatch.setattr(smtp_settings, name, value)
+
+    try:
+        send_confirm_task.run("first@mail.com", 1111)
+        send_confirm_task.run("second@mail.com", 2222)
+    finally:
+        close_smtp_sender()
+
+    assert len(box.messages) == 2
+    assert box.logins == 1
+
+
+def test_sender_stops_its_loop_on_close(mailbox: tuple[Mailbox, int]) -> None:
+    box, port = mailbox
+    sender = SMTPSender(_pool(port))
+
+    sender.send(_message(1), timeout=10)
+    sender.close(timeout=10)
+
+    assert len(box.messages) == 1
+    assert not sender._thread.is_alive()
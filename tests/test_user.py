@@ -1,5 +1,17 @@
 import pytest
 from httpx import AsyncClient
+from pytest import MonkeyPatch
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.auth.principal import get_principal_cache
+from core.constants.role import UserRole
+from core.settings import pagination_settings
+from db.crud.confirm import ConfirmCodeCRUD
+from db.crud.user import UserCRUD
+from db.dependencies import commit
+from db.models.user import User
+from services.confirm import ConfirmService
 
 
 @pytest.mark.anyio
@@ -53,3 +65,119 @@ async def test_delete_user_without_admin_returns_403(client: AsyncClient, fake_j
     assert response.status_code == 403
     data = response.json()
     assert "detail" in data
+
+
+@pytest.mark.anyio
+async def test_revoked_token_version_returns_401(
+    client: AsyncClient, fake_jwt_token: str, dbsession: AsyncSession
+) -> None:
+    headers = {"Authorization": f"Bearer {fake_jwt_token}"}
+    response = await client.get("/api/v1/users/me", headers=headers)
+    user_id = response.json()["id"]
+
+    await UserCRUD(session=dbsession, confirm_service=ConfirmService(ConfirmCodeCRUD(dbsession))).revoke_tokens(user_id)
+
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_set_role_revokes_tokens_with_old_role(
+    client: AsyncClient, fake_jwt_token: str, admin_jwt_token: str, dbsession: AsyncSession
+) -> None:
+    user_headers = {"Authorization": f"Bearer {fake_jwt_token}"}
+    user_id = (await client.get("/api/v1/users/me", headers=user_headers)).json()["id"]
+
+    response = await client.patch(
+        f"/api/v1/users/{user_id}/role",
+        json={"role": "ADMIN"},
+        headers={"Authorization": f"Bearer {admin_jwt_token}"},
+    )
+    assert response.status_code == 200
+    user = await dbsession.get(User, user_id, populate_existing=True)
+    assert user is not None
+    assert user.role == UserRole.ADMIN
+
+    response = await client.get("/api/v1/users/me", headers=user_headers)
+    assert response.status_code == 401
+    response = await client.patch(f"/api/v1/users/{user_id}/role", json={"role": "USER"}, headers=user_headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_demoted_admin_token_is_rejected_despite_cached_principal(
+    client: AsyncClient, fake_jwt_token: str, admin_jwt_token: str, dbsession: AsyncSession
+) -> None:
+    user_id = (await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {fake_jwt_token}"})).json()["id"]
+    user_crud = UserCRUD(session=dbsession, confirm_service=ConfirmService(ConfirmCodeCRUD(dbsession)))
+    await user_crud.set_role(user_id, UserRole.ADMIN)
+    await commit(dbsession)
+    response = await client.post("/api/v1/auth/login", json={"email": "user@mail.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert (await client.get("/api/v1/users/", headers=headers)).status_code == 200
+    stale_principal = get_principal_cache().get(user_id)
+    assert stale_principal is not None
+
+    response = await client.patch(
+        f"/api/v1/users/{user_id}/role",
+        json={"role": "USER"},
+        headers={"Authorization": f"Bearer {admin_jwt_token}"},
+    )
+    assert response.status_code == 200
+
+    # Another worker still holds the admin principal until its TTL runs out.
+    get_principal_cache().set(stale_principal)
+    assert (await client.get("/api/v1/users/", headers=headers)).status_code == 401
+
+
+@pytest.mark.anyio
+async def test_list_users_cursor_pagination_walks_both_ways(
+    client: AsyncClient, admin_jwt_token: str, dbsession: AsyncSession
+) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}"}
+    dbsession.add_all([User(email=f"page{i}@example.com", password="x") for i in range(5)])  # noqa: S106
+    await dbsession.flush()
+
+    response = await client.get("/api/v1/users/?pagination=cursor&limit=2", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    first_page = [user["id"] for user in data["items"]]
+    assert data["links"]["previous"] is None
+    assert data["links"]["count"] is None
+
+    seen = list(first_page)
+    next_link = data["links"]["next"]
+    while next_link:
+        data = (await client.get(next_link, headers=headers)).json()
+        seen += [user["id"] for user in data["items"]]
+        next_link = data["links"]["next"]
+    assert seen == sorted(seen)
+    assert len(seen) == 6
+
+    # Walking back from the last page returns the preceding rows in order.
+    data = (await client.get(data["links"]["previous"], headers=headers)).json()
+    assert [user["id"] for user in data["items"]] == seen[-4:-2]
+
+
+@pytest.mark.anyio
+async def test_list_users_invalid_cursor_returns_400(client: AsyncClient, admin_jwt_token: str) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}"}
+
+    response = await client.get("/api/v1/users/?cursor=bm90LWEtY3Vyc29y", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["code"] == "invalid_cursor"
+
+
+@pytest.mark.anyio
+async def test_list_users_estimated_count(
+    client: AsyncClient, admin_jwt_token: str, dbsession: AsyncSession, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(pagination_settings, "count_strategy", "estimate")
+    await dbsession.execute(text("ANALYZE custom_user"))
+    headers = {"Authorization": f"Bearer {admin_jwt_token}"}
+
+    response = await client.get("/api/v1/users/?limit=2", headers=headers)
+    assert response.status_code == 200
+    links = response.json()["links"]
+    assert links["count_estimated"] is True
+    assert links["count"] == 1
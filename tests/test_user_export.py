@@ -0,0 +1,59 @@
+import csv
+import gzip
+import io
+
+import orjson
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models.user import User
+
+
+@pytest.fixture
+async def export_users(dbsession: AsyncSession) -> None:
+    dbsession.add_all(
+        [
+            User(email="export1@example.com", first_name="Ann, Jr", password="x", is_verified=True),  # noqa: S106
+            User(email="export2@example.com", first_name="Bob", password="x"),  # noqa: S106
+        ]
+    )
+    await dbsession.flush()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("export_users")
+async def test_export_users_as_ndjson_with_filters(client: AsyncClient, admin_jwt_token: str) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}"}
+
+    response = await client.get("/api/v1/users/export?q=export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [row["email"] for row in rows] == ["export1@example.com", "export2@example.com"]
+    assert rows[0]["role"] == "USER"
+    assert rows[0]["created_at"].endswith("+00:00")
+    assert "password" not in rows[0]
+
+    response = await client.get("/api/v1/users/export?q=export&is_verified=false", headers=headers)
+    assert [orjson.loads(line)["email"] for line in response.content.splitlines()] == ["export2@example.com"]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("export_users")
+async def test_export_users_as_gzipped_csv(client: AsyncClient, admin_jwt_token: str) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}", "Accept-Encoding": "identity"}
+
+    async with client.stream("GET", "/api/v1/users/export?format=csv&gzip=true&q=export", headers=headers) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        body = gzip.decompress(b"".join([chunk async for chunk in response.aiter_raw()]))
+
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert [row["first_name"] for row in rows] == ["Ann, Jr", "Bob"]
+    assert rows[0]["is_verified"] == "true"
+
+
+@pytest.mark.anyio
+async def test_export_users_without_admin_returns_403(client: AsyncClient, fake_jwt_token: str) -> None:
+    response = await client.get("/api/v1/users/export", headers={"Authorization": f"Bearer {fake_jwt_token}"})
+    assert response.status_code == 403
@@ -0,0 +1,147 @@
+import json
+import random
+import string
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import Select, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.constants.role import UserRole
+from db.crud.user import UserCRUD
+from db.models.user import User
+from schemas.user import UserFilterSchema
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("filters", "count_index", "list_index"),
+    [
+        (UserFilterSchema(role=UserRole.ADMIN), "ix_custom_user_role", "ix_custom_user_role"),
+        (
+            UserFilterSchema(is_verified=False),
+            "ix_custom_user_is_verified_created_at",
+            "ix_custom_user_is_verified_created_at",
+        ),
+        (UserFilterSchema(created_from=datetime(2030, 1, 1)), "ix_custom_user_created_at", "ix_custom_user_created_at"),
+        (UserFilterSchema(created_to=datetime(2000, 1, 1)), "ix_custom_user_created_at", "ix_custom_user_created_at"),
+        # The cleanup task's predicate: unverified users created before a cutoff.
+        (
+            UserFilterSchema(is_verified=False, created_to=datetime(2100, 1, 1)),
+            "ix_custom_user_is_verified_created_at",
+            "ix_custom_user_is_verified_created_at",
+        ),
+        (
+            UserFilterSchema(is_verified=False, role=UserRole.USER, created_from=datetime(2000, 1, 1)),
+            "ix_custom_user_is_verified_created_at",
+            "ix_custom_user_is_verified_created_at",
+        ),
+        # Most rows match: walking the primary key in id order fills a page sooner.
+        (UserFilterSchema(is_verified=True), "ix_custom_user_is_verified_created_at", "pk_custom_user"),
+    ],
+)
+async def test_user_filters_use_indexes(
+    dbsession: AsyncSession,
+    explain: Callable[[Select[Any]], Awaitable[str]],
+    filters: UserFilterSchema,
+    count_index: str,
+    list_index: str,
+) -> None:
+    await dbsession.execute(
+        insert(User),
+        [
+            {
+                "email": f"filter{i}@example.com",
+                "first_name": f"First{i}",
+                "password": "x",
+                "is_verified": i % 10 != 0,
+                "role": UserRole.USER,
+            }
+            for i in range(500)
+        ],
+    )
+    await dbsession.execute(text("ANALYZE custom_user"))
+    await dbsession.execute(text("SET LOCAL enable_seqscan = off"))
+
+    count_plan = await explain(UserCRUD._filter(select(func.count()).select_from(User), filters))
+    list_plan = await explain(UserCRUD._filter(select(User), filters).order_by(User.id).limit(100))
+
+    assert "Seq Scan" not in count_plan
+    assert count_index in count_plan
+    assert list_index in list_plan
+
+
+def _scans(plan: Any) -> set[tuple[str, str]]:
+    """(node type, index name) of every index scan in a JSON plan."""
+    if isinstance(plan, list):
+        return set().union(*map(_scans, plan))
+    if not isinstance(plan, dict):
+        return set()
+    scans = {(plan["Node Type"], plan["Index Name"])} if "Index Name" in plan else set()
+    return scans.union(*map(_scans, plan.values()))
+
+
+@pytest.mark.anyio
+async def test_search_uses_trigram_index(
+    dbsession: AsyncSession, explain: Callable[[Select[Any]], Awaitable[str]]
+) -> None:
+    # Varied strings, as in real data: trigrams shared by every row make any index scan a full one.
+    words = random.Random(0)  # noqa: S311
+
+    def _word(length: int) -> str:
+        return "".join(words.choices(string.ascii_lowercase, k=length))
+
+    rows = [
+        {"email": f"{_word(10)}@{_word(6)}.com", "first_name": _word(7), "last_name": _word(8), "password": "x"}
+        for _ in range(500)
+    ]
+    await dbsession.execute(insert(User), [*rows, {"email": "needle@example.com", "password": "x"}])
+    await dbsession.execute(text("ANALYZE custom_user"))
+    # At this size walking the primary key is priced below the bitmap scan, so rule out plain scans.
+    await dbsession.execute(text("SET LOCAL enable_seqscan = off"))
+    await dbsession.execute(text("SET LOCAL enable_indexscan = off"))
+    filters = UserFilterSchema(q="needle")
+
+    count_plan = await explain(UserCRUD._filter(select(func.count()).select_from(User), filters))
+    list_plan = await explain(UserCRUD._filter(select(User), filters).order_by(User.id).limit(100))
+
+    for plan in (count_plan, list_plan):
+        assert _scans(json.loads(plan)) == {("Bitmap Index Scan", "ix_custom_user_search_trgm")}
+
+
+@pytest.mark.anyio
+async def test_list_users_filters_and_search(
+    client: AsyncClient, admin_jwt_token: str, dbsession: AsyncSession
+) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}"}
+    dbsession.add_all(
+        [
+            User(email="barista@example.com", first_name="Ann", password="x", is_verified=True),  # noqa: S106
+            User(email="roaster@example.com", first_name="Bob_", password="x"),  # noqa: S106
+        ]
+    )
+    await dbsession.flush()
+
+    response = await client.get("/api/v1/users/?q=ARIST", headers=headers)
+    assert [user["email"] for user in response.json()["items"]] == ["barista@example.com"]
+
+    # LIKE wildcards in the search term are matched literally.
+    response = await client.get("/api/v1/users/?q=ob_", headers=headers)
+    assert [user["email"] for user in response.json()["items"]] == ["roaster@example.com"]
+    response = await client.get("/api/v1/users/?q=o%25r", headers=headers)
+    assert response.json()["items"] == []
+
+    response = await client.get("/api/v1/users/?is_verified=false&role=USER", headers=headers)
+    data = response.json()
+    assert [user["email"] for user in data["items"]] == ["roaster@example.com"]
+    assert data["links"]["count"] == 1
+
+    created_to = (datetime.now(UTC) - timedelta(days=1)).isoformat()
+    response = await client.get("/api/v1/users/", params={"created_to": created_to}, headers=headers)
+    assert response.json()["items"] == []
+
+    response = await client.get("/api/v1/users/?q=ab", headers=headers)
+    assert response.status_code == 422
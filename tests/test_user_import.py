@@ -0,0 +1,56 @@
+import orjson
+import pytest
+from httpx import AsyncClient
+
+CSV_BODY = (
+    "email,first_name,last_name,password\n"
+    "alice@example.com,Alice,Smith,secret123\n"
+    'bob@example.com,"Bob\nJr",Jones,secret123\n'
+    "not-an-email,Carl,,secret123\n"
+    "alice@example.com,Alice,Again,secret123\n"
+    "admin@mail.com,Admin,Existing,secret123\n"
+    "short@example.com,Short,,123\n"
+)
+
+
+@pytest.mark.anyio
+async def test_import_users_from_csv_reports_rejected_rows(client: AsyncClient, admin_jwt_token: str) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}", "Content-Type": "text/csv"}
+
+    response = await client.post("/api/v1/users/import", content=CSV_BODY.encode(), headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["received"] == 6
+    assert report["imported"] == 2
+    assert [(error["row"], error["email"]) for error in report["errors"]] == [
+        (3, "not-an-email"),
+        (4, "alice@example.com"),
+        (5, "admin@mail.com"),
+        (6, "short@example.com"),
+    ]
+    assert report["errors"][1]["errors"] == ["Duplicate email in file"]
+    assert report["errors"][2]["errors"] == ["User with this email already exists"]
+
+    # Imported users are verified and can log in right away.
+    response = await client.post("/api/v1/auth/login", json={"email": "bob@example.com", "password": "secret123"})
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_import_users_from_ndjson(client: AsyncClient, admin_jwt_token: str) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}", "Content-Type": "application/x-ndjson"}
+    rows = [{"email": f"nd{i}@example.com", "password": "secret123"} for i in range(3)]
+    body = b"\n".join(orjson.dumps(row) for row in rows) + b"\n[1, 2]\n{broken\n"
+
+    response = await client.post("/api/v1/users/import", content=body, headers=headers)
+    report = response.json()
+    assert report["imported"] == 3
+    assert [error["errors"] for error in report["errors"]] == [["Row must be a JSON object"], ["Invalid JSON"]]
+
+
+@pytest.mark.anyio
+async def test_import_users_rejects_unknown_content_type(client: AsyncClient, admin_jwt_token: str) -> None:
+    headers = {"Authorization": f"Bearer {admin_jwt_token}", "Content-Type": "application/xml"}
+
+    response = await client.post("/api/v1/users/import", content=b"<users/>", headers=headers)
+    assert response.status_code == 415